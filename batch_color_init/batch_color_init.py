@@ -1,4 +1,5 @@
 import bpy
+import numpy as np
 
 bl_info = {
     "name": "VertX Artist - Batch Color Init Extension",
@@ -28,6 +29,18 @@ class BATCH_COLOR_INIT_OT_init_colors(bpy.types.Operator):
         default=(1.0, 1.0, 1.0)
     )
 
+    unique_meshes: bpy.props.BoolProperty(
+        name="Process Shared Meshes Once",
+        description="Initialize meshes shared by linked duplicates only once",
+        default=True
+    )
+
+    verbose: bpy.props.BoolProperty(
+        name="Verbose Log",
+        description="Print a line for every object to the console, not only the summary",
+        default=False
+    )
+
     @classmethod
     def poll(cls, context):
         return context.mode == 'OBJECT' and len(context.selected_objects) > 0
@@ -39,6 +52,8 @@ class BATCH_COLOR_INIT_OT_init_colors(bpy.types.Operator):
     def draw(self, context):
         layout = self.layout
         layout.prop(self, "init_color", text="Initial Color")
+        layout.prop(self, "unique_meshes")
+        layout.prop(self, "verbose")
 
     def execute(self, context):
         # Store the original active object
@@ -53,40 +68,53 @@ class BATCH_COLOR_INIT_OT_init_colors(bpy.types.Operator):
             self.report({'WARNING'}, "No mesh objects selected")
             return {'CANCELLED'}
 
-        for obj in selected_meshes:
-            print(f"Processing {obj.name}")
+        object_count = len(selected_meshes)
+        mesh_count = len({obj.data.name for obj in selected_meshes})
+
+        # Linked duplicates share one mesh, initialize it once
+        if self.unique_meshes:
+            selected_meshes = list({obj.data.name: obj for obj in selected_meshes}.values())
+
+        # Same color for every corner, tiled to the largest attribute once
+        color_with_alpha = np.array((self.init_color[0], self.init_color[1], self.init_color[2], 1.0), dtype=np.float32)
+        max_corners = max(len(obj.data.loops) for obj in selected_meshes)
+        color_buffer = np.tile(color_with_alpha, max_corners)
+
+        log = []
 
+        for obj in selected_meshes:
             # Check if object already has color attributes (check the data directly)
             if len(obj.data.color_attributes) > 0:
-                print(f"  Skipping {obj.name} - already has color attributes")
+                log.append(f"  Skipping {obj.name} - already has color attributes")
                 skipped_count += 1
                 continue
-                
-            print(f"  Creating color attribute for {obj.name}")
-            
+
             # Create color attribute directly
             color_attribute = obj.data.color_attributes.new(
                 name='Color',
                 type='BYTE_COLOR',
                 domain='CORNER'
             )
-            
+
             # Set the initial color for all corners
-            color_with_alpha = (self.init_color[0], self.init_color[1], self.init_color[2], 1.0)
-            for i in range(len(color_attribute.data)):
-                color_attribute.data[i].color = color_with_alpha
-            
+            color_attribute.data.foreach_set('color', color_buffer[:len(color_attribute.data) * 4])
+
             # Set active color index if it's not valid
             num_color_attrs = len(obj.data.color_attributes)
             current_index = obj.data.color_attributes.active_color_index
-            
+
             if not isinstance(current_index, int) or current_index < 0 or current_index >= num_color_attrs:
                 # Set to the last index (our newly created attribute)
                 obj.data.color_attributes.active_color_index = num_color_attrs - 1
-                print(f"  Set active color index to {num_color_attrs - 1} for {obj.name}")
-            
+                log.append(f"  Set active color index to {num_color_attrs - 1} for {obj.name}")
+
+            log.append(f"  Created color attribute for {obj.name}")
             processed_count += 1
 
+        print(f"Batch Color Init: {object_count} objects, {mesh_count} unique meshes, {processed_count} color attributes created, {skipped_count} skipped")
+        if self.verbose and log:
+            print("\n".join(log))
+
         # Restore original active object
         context.view_layer.objects.active = original_active
 
@@ -0,0 +1,93 @@
+"""Refresh before and after vectorization, on random corner colors.
+
+Before walks every corner in Python, the way Refresh read them from bmesh.
+After quantizes, counts and sorts all corners with NumPy. Run from the
+repository root:
+
+    python benchmarks/refresh_benchmark.py [corner count]
+"""
+
+import colorsys
+import importlib
+import sys
+import time
+import types
+from pathlib import Path
+
+import numpy as np
+
+
+def load(name):
+    """Import an add-on module without the package __init__, which needs bpy."""
+
+    if 'vertx_artist' not in sys.modules:
+        package = types.ModuleType('vertx_artist')
+        package.__path__ = [str(Path(__file__).resolve().parents[1] / 'vertx_artist')]
+        sys.modules['vertx_artist'] = package
+
+    return importlib.import_module(f'vertx_artist.{name}')
+
+
+color_index = load('color_index')
+
+
+def round_color(color, precision=5):
+    return tuple(round(x, precision) for x in color)
+
+
+def refresh_before(corner_colors, corner_verts, weights):
+    colors = {}
+    color_corner_lookup = {}
+    corner_color_lookup = {}
+
+    for corner, (color, vert, weight) in enumerate(zip(corner_colors.tolist(), corner_verts.tolist(), weights.tolist())):
+        color = round_color(color)
+        colors.setdefault(color, [len(colors), 0])[1] += weight
+
+        color_corner_lookup.setdefault(colors[color][0], [color, {}])[1].setdefault('obj', {}).setdefault(vert, []).append(corner)
+        corner_color_lookup[('obj', corner)] = colors[color][0]
+
+    colors = sorted(colors.items(), key=lambda x: colorsys.rgb_to_hsv(*x[0]))
+    active_color = max(range(len(colors)), key=lambda x: colors[x][1][1])
+
+    return [x[0] for x in colors], colors[active_color][0]
+
+
+def refresh_after(corner_colors, corner_verts, weights):
+    palette, color_ids = color_index.quantize_colors(corner_colors)
+    counts = np.bincount(color_ids, weights=weights, minlength=len(palette))
+
+    lookup = color_index.ColorLookup(palette.tolist(), {'obj': color_index.ObjectColorIndex(color_ids, len(palette), corner_verts)})
+    active_color = lookup.order[int(np.argmax(counts[lookup.order]))]
+
+    return [lookup.colors[x] for x in lookup.order], lookup.colors[active_color]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+
+    return time.perf_counter() - start, result
+
+
+def main():
+    corner_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    rng = np.random.default_rng(0)
+    # Byte colors from a small palette, as painted meshes have
+    palette = rng.integers(0, 256, (64, 3)) / 255
+    corner_colors = palette[rng.integers(0, len(palette), corner_count)].astype(np.float32)
+    corner_verts = rng.integers(0, corner_count // 4, corner_count).astype(np.int32)
+    weights = rng.integers(0, 2, corner_count).astype(np.int64)
+
+    before_time, before = timed(refresh_before, corner_colors, corner_verts, weights)
+    after_time, after = timed(refresh_after, corner_colors, corner_verts, weights)
+
+    print(f'{corner_count} corners, {len(before[0])} colors')
+    print(f'before: {before_time * 1000:.1f} ms')
+    print(f'after:  {after_time * 1000:.1f} ms ({before_time / after_time:.1f}x)')
+    print('same colors and active color:', before == after)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+"""Add-on modules that do not need bpy are imported without the package __init__, which does."""
+
+import sys
+import types
+from pathlib import Path
+
+
+package = types.ModuleType('vertx_artist')
+package.__path__ = [str(Path(__file__).resolve().parents[1] / 'vertx_artist')]
+sys.modules.setdefault('vertx_artist', package)
@@ -0,0 +1,350 @@
+import colorsys
+import importlib
+
+import numpy as np
+import pytest
+
+
+blending = importlib.import_module('vertx_artist.blending')
+
+
+# Scalar mix_color the array blend functions replaced
+def mix_color(r_col, col, blend_type, fac):
+    """Mix color with modification, r_col is changed in place."""
+
+    facm = 1 - fac
+
+    match blend_type:
+        case "Mix":
+            r_col[0] = facm * r_col[0] + fac * col[0]
+            r_col[1] = facm * r_col[1] + fac * col[1]
+            r_col[2] = facm * r_col[2] + fac * col[2]
+
+        case "Add":
+            r_col[0] += fac * col[0]
+            r_col[1] += fac * col[1]
+            r_col[2] += fac * col[2]
+
+        case "Multiply":
+            r_col[0] *= (facm + fac * col[0])
+            r_col[1] *= (facm + fac * col[1])
+            r_col[2] *= (facm + fac * col[2])
+
+        case "Screen":
+            r_col[0] = 1 - (facm + fac * (1 - col[0])) * (1 - r_col[0])
+            r_col[1] = 1 - (facm + fac * (1 - col[1])) * (1 - r_col[1])
+            r_col[2] = 1 - (facm + fac * (1 - col[2])) * (1 - r_col[2])
+
+        case "Overlay":
+            if r_col[0] < 0.5:
+                r_col[0] *= (facm + 2 * fac * col[0])
+            else:
+                r_col[0] = 1 - (facm + 2 * fac * (1 - col[0])) * (1 - r_col[0])
+
+            if r_col[1] < 0.5:
+                r_col[1] *= (facm + 2 * fac * col[1])
+            else:
+                r_col[1] = 1 - (facm + 2 * fac * (1 - col[1])) * (1 - r_col[1])
+
+            if r_col[2] < 0.5:
+                r_col[2] *= (facm + 2 * fac * col[2])
+            else:
+                r_col[2] = 1 - (facm + 2 * fac * (1 - col[2])) * (1 - r_col[2])
+
+        case "Subtract":
+            r_col[0] -= fac * col[0]
+            r_col[1] -= fac * col[1]
+            r_col[2] -= fac * col[2]
+
+        case "Divide":
+            if col[0] != 0:
+                r_col[0] = facm * r_col[0] + fac * r_col[0] / col[0]
+            if col[1] != 0:
+                r_col[1] = facm * r_col[1] + fac * r_col[1] / col[1]
+            if col[2] != 0:
+                r_col[2] = facm * r_col[2] + fac * r_col[2] / col[2]
+
+        case "Difference":
+            r_col[0] = facm * r_col[0] + fac * abs(r_col[0] - col[0])
+            r_col[1] = facm * r_col[1] + fac * abs(r_col[1] - col[1])
+            r_col[2] = facm * r_col[2] + fac * abs(r_col[2] - col[2])
+
+        case "Darken":
+            r_col[0] = min(r_col[0], col[0]) * fac + r_col[0] * facm
+            r_col[1] = min(r_col[1], col[1]) * fac + r_col[1] * facm
+            r_col[2] = min(r_col[2], col[2]) * fac + r_col[2] * facm
+
+        case "Lighten":
+            tmp = fac * col[0]
+
+            if tmp > r_col[0]:
+                r_col[0] = tmp
+
+            tmp = fac * col[1]
+
+            if tmp > r_col[1]:
+                r_col[1] = tmp
+
+            tmp = fac * col[2]
+
+            if tmp > r_col[2]:
+                r_col[2] = tmp
+
+        case "Color Dodge":
+            if r_col[0] != 0:
+                tmp = 1 - fac * col[0]
+
+                if tmp <= 0:
+                    r_col[0] = 1
+                elif (tmp := r_col[0] / tmp) > 1:
+                    r_col[0] = 1
+                else:
+                    r_col[0] = tmp
+
+            if r_col[1] != 0:
+                tmp = 1 - fac * col[1]
+
+                if tmp <= 0:
+                    r_col[1] = 1
+                elif (tmp := r_col[1] / tmp) > 1:
+                    r_col[1] = 1
+                else:
+                    r_col[1] = tmp
+
+            if r_col[2] != 0:
+                tmp = 1 - fac * col[2]
+
+                if tmp <= 0:
+                    r_col[2] = 1
+                elif (tmp := r_col[2] / tmp) > 1:
+                    r_col[2] = 1
+                else:
+                    r_col[2] = tmp
+
+        case "Color Burn":
+            tmp = facm + fac * col[0]
+
+            if tmp <= 0:
+                r_col[0] = 0
+            elif (tmp := 1 - (1 - r_col[0]) / tmp) < 0:
+                r_col[0] = 0
+            elif tmp > 1:
+                r_col[0] = 1
+            else:
+                r_col[0] = tmp
+
+            tmp = facm + fac * col[1]
+
+            if tmp <= 0:
+                r_col[1] = 0
+            elif (tmp := 1 - (1 - r_col[1]) / tmp) < 0:
+                r_col[1] = 0
+            elif tmp > 1:
+                r_col[1] = 1
+            else:
+                r_col[1] = tmp
+
+            tmp = facm + fac * col[2]
+
+            if tmp <= 0:
+                r_col[2] = 0
+            elif (tmp := 1 - (1 - r_col[2]) / tmp) < 0:
+                r_col[2] = 0
+            elif tmp > 1:
+                r_col[2] = 1
+            else:
+                r_col[2] = tmp
+
+        case "Hue":
+            col_h, col_s, col_v = colorsys.rgb_to_hsv(col[0], col[1], col[2])
+
+            if col_s != 0:
+                r_h, r_s, r_v = colorsys.rgb_to_hsv(r_col[0], r_col[1], r_col[2])
+                tmp_r, tmp_g, tmp_b = colorsys.hsv_to_rgb(col_h, r_s, r_v)
+
+                r_col[0] = facm * r_col[0] + fac * tmp_r
+                r_col[1] = facm * r_col[1] + fac * tmp_g
+                r_col[2] = facm * r_col[2] + fac * tmp_b
+
+        case "Saturation":
+            r_h, r_s, r_v = colorsys.rgb_to_hsv(r_col[0], r_col[1], r_col[2])
+
+            if r_s != 0:
+                col_h, col_s, col_v = colorsys.rgb_to_hsv(col[0], col[1], col[2])
+                r_col[0], r_col[1], r_col[2] = colorsys.hsv_to_rgb(r_h, facm * r_s + fac * col_s, r_v)
+
+        case "Value":
+            r_h, r_s, r_v = colorsys.rgb_to_hsv(r_col[0], r_col[1], r_col[2])
+            col_h, col_s, col_v = colorsys.rgb_to_hsv(col[0], col[1], col[2])
+            r_col[0], r_col[1], r_col[2] = colorsys.hsv_to_rgb(r_h, r_s, facm * r_v + fac * col_v)
+
+        case "Color":
+            col_h, col_s, col_v = colorsys.rgb_to_hsv(col[0], col[1], col[2])
+
+            if col_s != 0:
+                r_h, r_s, r_v = colorsys.rgb_to_hsv(r_col[0], r_col[1], r_col[2])
+                tmp_r, tmp_g, tmp_b = colorsys.hsv_to_rgb(col_h, col_s, r_v)
+
+                r_col[0] = facm * r_col[0] + fac * tmp_r
+                r_col[1] = facm * r_col[1] + fac * tmp_g
+                r_col[2] = facm * r_col[2] + fac * tmp_b
+
+        case "Soft Light":
+            scr = 1 - (1 - col[0]) * (1 - r_col[0])
+            scg = 1 - (1 - col[1]) * (1 - r_col[1])
+            scb = 1 - (1 - col[2]) * (1 - r_col[2])
+
+            r_col[0] = facm * r_col[0] + fac * ((1 - r_col[0]) * col[0] * r_col[0] + r_col[0] * scr)
+            r_col[1] = facm * r_col[1] + fac * ((1 - r_col[1]) * col[1] * r_col[1] + r_col[1] * scg)
+            r_col[2] = facm * r_col[2] + fac * ((1 - r_col[2]) * col[2] * r_col[2] + r_col[2] * scb)
+
+        case "Linear Light":
+            if col[0] > 0.5:
+                r_col[0] += fac * (2 * (col[0] - 0.5))
+            else:
+                r_col[0] += fac * (2 * col[0] - 1)
+
+            if col[1] > 0.5:
+                r_col[1] += fac * (2 * (col[1] - 0.5))
+            else:
+                r_col[1] += fac * (2 * col[1] - 1)
+
+            if col[2] > 0.5:
+                r_col[2] += fac * (2 * (col[2] - 0.5))
+            else:
+                r_col[2] += fac * (2 * col[2] - 1)
+
+
+def clamped_mix_color(r_col, col, blend_type, fac):
+    """mix_color of a copy, clamped as byte colors store it after every modification."""
+
+    r_col = list(r_col)
+    mix_color(r_col, col, blend_type, fac)
+
+    return [min(max(x, 0), 1) for x in r_col]
+
+
+def scalar_stack(colors, modifications):
+    out = []
+    for r_col in colors.tolist():
+        for blend_type, col, fac in modifications:
+            r_col = clamped_mix_color(r_col, col, blend_type, fac)
+        out.append(r_col)
+
+    return np.array(out)
+
+
+def random_colors(count, seed=0):
+    return np.random.default_rng(seed).random((count, 3)).astype(np.float32)
+
+
+@pytest.mark.parametrize('modifications', [
+    [("Mix", (0.1, 0.2, 0.3), 1.0)],
+    [("Mix", (0.0, 0.0, 0.0), 1.0)],
+    [("Multiply", (0.0, 0.5, 1.0), 1.0)],
+    [("Multiply", (0.0, 0.0, 0.0), 1.0)],
+    [("Multiply", (0.0, 0.5, 1.0), 1.0), ("Add", (0.2, 0.2, 0.2), 0.5)],
+    [("Add", (0.3, 0.0, 0.1), 1.0), ("Mix", (0.1, 0.2, 0.3), 1.0), ("Subtract", (0.5, 0.0, 0.2), 0.7)],
+])
+def test_folded_stack_matches_scalar(modifications):
+    colors = random_colors(1000)
+    steps = blending.compile_stack(modifications)
+
+    assert all(isinstance(x, blending.AffineStep) for x in steps)
+
+    out = blending.run_stack(colors, steps, {})
+
+    assert not np.isnan(out).any()
+    np.testing.assert_allclose(out, scalar_stack(colors, modifications), atol=1e-6)
+
+
+# Channels at 0, 0.5 and 1, grays with zero saturation
+EDGE_COLORS = np.array([
+    (0.0, 0.0, 0.0),
+    (1.0, 1.0, 1.0),
+    (0.5, 0.5, 0.5),
+    (0.25, 0.25, 0.25),
+    (0.0, 0.5, 1.0),
+    (1.0, 0.0, 0.5),
+    (0.5, 1.0, 0.0),
+    (0.0, 0.0, 0.7),
+], dtype=np.float32)
+
+
+def edge_colors(count):
+    """Random colors, then every edge color repeated once for every edge color."""
+
+    return np.concatenate((random_colors(count), np.repeat(EDGE_COLORS, len(EDGE_COLORS), axis=0)))
+
+
+@pytest.mark.parametrize('blend_type', list(blending.blend_functions))
+@pytest.mark.parametrize('fac', [0.0, 0.35, 1.0])
+@pytest.mark.parametrize('flat', [True, False])
+def test_blend_functions_match_scalar(blend_type, fac, flat):
+    colors = edge_colors(200)
+
+    # Col 0 divides by zero, at fac 1 it makes burn 1 - fac + fac * col zero, col 1 does that for dodge 1 - fac * col
+    if flat:
+        blend_colors = [tuple(x) for x in EDGE_COLORS.tolist()] + [(0.2, 0.7, 0.4)]
+    else:
+        # Every edge color meets every edge color of the corners
+        blend_colors = [np.concatenate((random_colors(200, 1), np.tile(EDGE_COLORS, (len(EDGE_COLORS), 1))))]
+
+    for col in blend_colors:
+        col_rows = np.broadcast_to(np.asarray(col, dtype=np.float32), colors.shape)
+
+        expected = []
+        for r_col, c in zip(colors.tolist(), col_rows.tolist()):
+            mix_color(r_col, c, blend_type, fac)
+            expected.append(r_col)
+
+        out = blending.mix_colors(colors, col, blend_type, fac)
+
+        assert not np.isnan(out).any()
+        np.testing.assert_allclose(out, expected, rtol=1e-6, atol=1e-6)
+
+
+def per_step(colors, modifications, layers):
+    """Every modification applied to all colors at once, without folding or chunks."""
+
+    r_col = np.asarray(colors, dtype=np.float64)
+    for blend_type, col, fac in modifications:
+        col = layers[col] if isinstance(col, str) else np.asarray(col, dtype=np.float64)
+        r_col = np.clip(blending.mix_colors(r_col, col, blend_type, fac), 0, 1)
+
+    return r_col
+
+
+STACK = [
+    ("Multiply", (0.8, 0.5, 1.0), 0.6),
+    ("Add", (0.1, 0.0, 0.2), 1.0),
+    ("Overlay", "detail", 0.5),
+    ("Mix", (0.3, 0.6, 0.9), 0.25),
+    ("Subtract", (0.05, 0.1, 0.0), 1.0),
+    ("Hue", (0.9, 0.2, 0.1), 0.4),
+    ("Linear Light", "detail", 0.3),
+    ("Divide", (0.5, 0.7, 0.9), 0.5),
+    ("Multiply", (0.0, 0.5, 1.0), 1.0),
+    ("Mix", "mask", 0.7),
+]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 100, 1 << 16])
+@pytest.mark.parametrize('max_workers', [1, 2, 4])
+def test_stacks_match_per_step(monkeypatch, chunk_size, max_workers):
+    monkeypatch.setattr(blending, 'CHUNK_SIZE', chunk_size)
+
+    jobs = []
+    for seed, count in enumerate([300, 1, 0, 250, 512]):
+        layers = {'detail': random_colors(count, seed + 10), 'mask': random_colors(count, seed + 20)}
+        jobs.append((random_colors(count, seed), layers))
+
+    steps = blending.compile_stack(STACK)
+    assert any(isinstance(x, blending.AffineStep) for x in steps)
+
+    results = blending.run_stacks(jobs, steps, max_workers)
+
+    assert len(results) == len(jobs)
+    for (colors, layers), result in zip(jobs, results):
+        assert result.shape == colors.shape
+        np.testing.assert_allclose(result, per_step(colors, STACK, layers), atol=1e-6)
@@ -0,0 +1,64 @@
+import colorsys
+import importlib
+
+import numpy as np
+
+
+color_index = importlib.import_module('vertx_artist.color_index')
+
+
+def random_lookup(color_count=20, corner_count=500):
+    rng = np.random.default_rng(0)
+    palette = np.round(rng.uniform(0, 1, (color_count, 3)), 5)
+    color_ids = rng.integers(0, color_count, corner_count)
+
+    index = color_index.ObjectColorIndex(color_ids, color_count, np.arange(corner_count, dtype=np.int32))
+    return color_index.ColorLookup(palette.tolist(), {'mesh': index})
+
+
+def assert_consistent(lookup):
+    """Lookup matches one built from scratch from the same corners."""
+
+    index = lookup.meshes['mesh']
+    corner_colors = np.array([lookup.colors[x] for x in index.color_ids.tolist()])
+    expected = color_index.ColorLookup(*lookup_arguments(corner_colors))
+
+    assert lookup.sort_keys == sorted(lookup.sort_keys)
+    assert lookup.sort_keys == [colorsys.rgb_to_hsv(*lookup.colors[x]) for x in lookup.order]
+    assert [lookup.colors[x] for x in lookup.order] == [expected.colors[x] for x in expected.order]
+
+    for color_id in range(len(lookup.colors)):
+        corners = np.flatnonzero(index.color_ids == color_id)
+        np.testing.assert_array_equal(lookup.corners('mesh', color_id), corners)
+        assert lookup.color_counts[color_id] == len(corners)
+
+
+def lookup_arguments(corner_colors):
+    palette, color_ids = color_index.quantize_colors(corner_colors)
+    index = color_index.ObjectColorIndex(color_ids, len(palette), np.arange(len(color_ids), dtype=np.int32))
+
+    return palette.tolist(), {'mesh': index}
+
+
+def test_recolor_keeps_sort_order():
+    lookup = random_lookup()
+    rng = np.random.default_rng(1)
+
+    for _ in range(50):
+        color_id = lookup.order[rng.integers(len(lookup.order))]
+        lookup.recolor(color_id, rng.uniform(0, 1, 3).tolist())
+
+        assert_consistent(lookup)
+
+
+def test_recolor_merges_same_color():
+    lookup = random_lookup()
+    color_id, other = lookup.order[0], lookup.order[-1]
+    corners = np.union1d(lookup.corners('mesh', color_id), lookup.corners('mesh', other))
+
+    lookup.recolor(color_id, lookup.colors[other])
+
+    assert other not in lookup.positions
+    assert lookup.color_id(lookup.colors[other]) == color_id
+    np.testing.assert_array_equal(lookup.corners('mesh', color_id), corners)
+    assert_consistent(lookup)
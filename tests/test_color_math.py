@@ -0,0 +1,69 @@
+import colorsys
+import importlib
+import math
+
+import numpy as np
+import pytest
+
+
+color_math = importlib.import_module('vertx_artist.color_math')
+
+
+# Scalar functions the array kernels replaced
+def inverse_gamma(c: float):
+    c = min(max(0, c), 1)
+    c = c / 12.92 if c < 0.04045 else math.pow((c + 0.055) / 1.055, 2.4)
+
+    return c
+
+
+def gamma_correct(c: float):
+    c = max(0.0, c * 12.92) if c < 0.0031308 else 1.055 * math.pow(c, 1.0 / 2.4) - 0.055
+    c = max(min(int(c * 255 + 0.5), 255), 0)
+
+    return c / 255
+
+
+def random_values(dtype):
+    rng = np.random.default_rng(0)
+    values = rng.uniform(-0.1, 1.1, 100_000).astype(dtype)
+
+    # Thresholds, bounds and their neighbours
+    edges = np.array([0.0, 1.0, 0.04045, 0.0031308], dtype=dtype)
+    edges = np.concatenate((edges, np.nextafter(edges, dtype(-1)), np.nextafter(edges, dtype(2))))
+
+    return np.concatenate((values, edges))
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+def test_inverse_gamma_matches_scalar(dtype):
+    values = random_values(dtype)
+    expected = np.array([inverse_gamma(x) for x in values.tolist()])
+
+    np.testing.assert_array_equal(color_math.inverse_gamma_array(values), expected)
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+def test_gamma_correct_matches_scalar(dtype):
+    values = random_values(dtype)
+    expected = np.array([gamma_correct(x) for x in values.tolist()])
+
+    np.testing.assert_array_equal(color_math.gamma_correct_array(values), expected)
+
+
+def test_inverse_gamma_lut_matches_scalar():
+    # Byte colors as read from color_srgb
+    values = np.arange(256, dtype=np.float32) / np.float32(255)
+    expected = np.array([inverse_gamma(x) for x in values.tolist()])
+
+    np.testing.assert_array_equal(color_math.inverse_gamma_array(values, byte_color=True), expected)
+    np.testing.assert_array_equal(color_math.inverse_gamma_array(values.reshape(16, 16), byte_color=True), expected.reshape(16, 16))
+
+
+def test_hsv_conversions_match_colorsys():
+    rng = np.random.default_rng(1)
+    rgb = np.concatenate((rng.random((10_000, 3)), rng.integers(0, 3, (1000, 3)) / 2))
+
+    hsv = color_math.rgb_to_hsv_array(rgb)
+    np.testing.assert_array_equal(hsv, [colorsys.rgb_to_hsv(*x) for x in rgb.tolist()])
+    np.testing.assert_array_equal(color_math.hsv_to_rgb_array(hsv), [colorsys.hsv_to_rgb(*x) for x in hsv.tolist()])
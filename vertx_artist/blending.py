@@ -0,0 +1,274 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .color_math import hsv_to_rgb_array, rgb_to_hsv_array
+
+
+# https://github.com/blender/blender/blob/57013e2a44e974d307f08f41793d810a49537f96/source/blender/blenkernel/intern/material.c#L1521
+# Every blend function takes (N, 3) colors, and (N, 3) or (3,) blend colors
+def blend_mix(r_col, col, fac):
+    return (1 - fac) * r_col + fac * col
+
+
+def blend_add(r_col, col, fac):
+    return r_col + fac * col
+
+
+def blend_multiply(r_col, col, fac):
+    return r_col * ((1 - fac) + fac * col)
+
+
+def blend_screen(r_col, col, fac):
+    return 1 - ((1 - fac) + fac * (1 - col)) * (1 - r_col)
+
+
+def blend_overlay(r_col, col, fac):
+    facm = 1 - fac
+
+    return np.where(
+        r_col < 0.5,
+        r_col * (facm + 2 * fac * col),
+        1 - (facm + 2 * fac * (1 - col)) * (1 - r_col)
+    )
+
+
+def blend_subtract(r_col, col, fac):
+    return r_col - fac * col
+
+
+def blend_divide(r_col, col, fac):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        divided = (1 - fac) * r_col + fac * r_col / col
+
+    return np.where(col != 0, divided, r_col)
+
+
+def blend_difference(r_col, col, fac):
+    return (1 - fac) * r_col + fac * np.abs(r_col - col)
+
+
+def blend_darken(r_col, col, fac):
+    return np.minimum(r_col, col) * fac + r_col * (1 - fac)
+
+
+def blend_lighten(r_col, col, fac):
+    tmp = fac * col
+
+    return np.where(tmp > r_col, tmp, r_col)
+
+
+def blend_dodge(r_col, col, fac):
+    tmp = 1 - fac * col
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dodged = np.where(tmp <= 0, 1, np.minimum(r_col / tmp, 1))
+
+    return np.where(r_col != 0, dodged, r_col)
+
+
+def blend_burn(r_col, col, fac):
+    tmp = (1 - fac) + fac * col
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        burned = np.clip(1 - (1 - r_col) / tmp, 0, 1)
+
+    return np.where(tmp <= 0, 0, burned)
+
+
+def blend_hue(r_col, col, fac):
+    col_hsv = rgb_to_hsv_array(np.broadcast_to(col, r_col.shape))
+    r_hsv = rgb_to_hsv_array(r_col)
+
+    tmp = hsv_to_rgb_array(np.stack((col_hsv[:, 0], r_hsv[:, 1], r_hsv[:, 2]), axis=-1))
+
+    return np.where(col_hsv[:, 1:2] != 0, (1 - fac) * r_col + fac * tmp, r_col)
+
+
+def blend_saturation(r_col, col, fac):
+    col_hsv = rgb_to_hsv_array(np.broadcast_to(col, r_col.shape))
+    r_hsv = rgb_to_hsv_array(r_col)
+
+    tmp = hsv_to_rgb_array(np.stack((r_hsv[:, 0], (1 - fac) * r_hsv[:, 1] + fac * col_hsv[:, 1], r_hsv[:, 2]), axis=-1))
+
+    return np.where(r_hsv[:, 1:2] != 0, tmp, r_col)
+
+
+def blend_value(r_col, col, fac):
+    col_hsv = rgb_to_hsv_array(np.broadcast_to(col, r_col.shape))
+    r_hsv = rgb_to_hsv_array(r_col)
+
+    return hsv_to_rgb_array(np.stack((r_hsv[:, 0], r_hsv[:, 1], (1 - fac) * r_hsv[:, 2] + fac * col_hsv[:, 2]), axis=-1))
+
+
+def blend_color(r_col, col, fac):
+    col_hsv = rgb_to_hsv_array(np.broadcast_to(col, r_col.shape))
+    r_hsv = rgb_to_hsv_array(r_col)
+
+    tmp = hsv_to_rgb_array(np.stack((col_hsv[:, 0], col_hsv[:, 1], r_hsv[:, 2]), axis=-1))
+
+    return np.where(col_hsv[:, 1:2] != 0, (1 - fac) * r_col + fac * tmp, r_col)
+
+
+def blend_soft_light(r_col, col, fac):
+    scr = 1 - (1 - col) * (1 - r_col)
+
+    return (1 - fac) * r_col + fac * ((1 - r_col) * col * r_col + r_col * scr)
+
+
+def blend_linear_light(r_col, col, fac):
+    return r_col + fac * np.where(col > 0.5, 2 * (col - 0.5), 2 * col - 1)
+
+
+blend_functions = {
+    "Mix": blend_mix,
+    "Darken": blend_darken,
+    "Multiply": blend_multiply,
+    "Color Burn": blend_burn,
+    "Lighten": blend_lighten,
+    "Screen": blend_screen,
+    "Color Dodge": blend_dodge,
+    "Add": blend_add,
+    "Overlay": blend_overlay,
+    "Soft Light": blend_soft_light,
+    "Linear Light": blend_linear_light,
+    "Difference": blend_difference,
+    "Subtract": blend_subtract,
+    "Divide": blend_divide,
+    "Hue": blend_hue,
+    "Saturation": blend_saturation,
+    "Color": blend_color,
+    "Value": blend_value
+}
+
+
+def mix_colors(r_col, col, blend_type, fac):
+    """Mix (N, 3) colors with modification, return mixed colors."""
+
+    return blend_functions[blend_type](
+        np.asarray(r_col, dtype=np.float64),
+        np.asarray(col, dtype=np.float64),
+        fac
+    )
+
+
+# Flat color modifications, which are an affine transform of the color
+affine_blend_types = {"Mix", "Add", "Multiply", "Subtract"}
+
+CHUNK_SIZE = 65536
+
+
+def affine_blend(blend_type, col, fac):
+    """Scale and offset of flat color modification."""
+
+    col = np.asarray(col, dtype=np.float64)
+
+    match blend_type:
+        case "Mix":
+            return np.full(3, 1 - fac), fac * col
+        case "Add":
+            return np.ones(3), fac * col
+        case "Multiply":
+            return (1 - fac) + fac * col, np.zeros(3)
+        case "Subtract":
+            return np.ones(3), -fac * col
+
+
+class AffineStep:
+    """Consecutive flat color modifications, folded into one clamped affine transform.
+
+    Applies min(max(scale * color + offset, low), high). Clamping after every
+    folded modification only moves low and high, since scales are not negative.
+    Bounds start finite, a zero scale (0 * inf) would make them NaN.
+    """
+
+    def __init__(self):
+        self.scale = np.ones(3)
+        self.offset = np.zeros(3)
+        self.low = np.full(3, -np.finfo(np.float64).max)
+        self.high = np.full(3, np.finfo(np.float64).max)
+
+    def fold(self, scale, offset):
+        self.scale = scale * self.scale
+        self.offset = scale * self.offset + offset
+
+        # Scales above 1 may overflow the bounds to inf, which clamps the same
+        with np.errstate(over='ignore'):
+            self.low = np.clip(scale * self.low + offset, 0, 1)
+            self.high = np.clip(scale * self.high + offset, 0, 1)
+
+    def apply(self, r_col, layers, start, stop):
+        return np.minimum(np.maximum(r_col * self.scale + self.offset, self.low), self.high)
+
+
+class BlendStep:
+    """Modification applied with its blend function."""
+
+    def __init__(self, blend_type, col, fac):
+        self.blend_type = blend_type
+        self.col = col
+        self.fac = fac
+
+    def apply(self, r_col, layers, start, stop):
+        col = layers[self.col][start:stop] if isinstance(self.col, str) else self.col
+
+        return np.clip(mix_colors(r_col, col, self.blend_type, self.fac), 0, 1)
+
+
+def compile_stack(modifications):
+    """Compile (blend_type, col, fac) modifications into steps.
+
+    col is a flat color, or name of a blend layer.
+    """
+
+    steps = []
+
+    for blend_type, col, fac in modifications:
+        if isinstance(col, str) or blend_type not in affine_blend_types:
+            steps.append(BlendStep(blend_type, col if isinstance(col, str) else np.asarray(col, dtype=np.float64), fac))
+            continue
+
+        col = np.asarray(col, dtype=np.float64)
+
+        # Folding needs scales that are not negative
+        if np.any(col < 0) or not 0 <= fac <= 1:
+            steps.append(BlendStep(blend_type, col, fac))
+            continue
+
+        if not steps or not isinstance(steps[-1], AffineStep):
+            steps.append(AffineStep())
+        steps[-1].fold(*affine_blend(blend_type, col, fac))
+
+    return steps
+
+
+def run_stack(colors, steps, layers):
+    """Apply compiled steps to (N, 3) colors, chunk by chunk.
+
+    layers maps blend layer names to (N, 3) colors. Colors are clamped after
+    every modification.
+    """
+
+    out = np.empty(np.shape(colors), dtype=np.float32)
+
+    for start in range(0, len(colors), CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, len(colors))
+        r_col = np.asarray(colors[start:stop], dtype=np.float64)
+
+        for step in steps:
+            r_col = step.apply(r_col, layers, start, stop)
+
+        out[start:stop] = r_col
+
+    return out
+
+
+def run_stacks(jobs, steps, max_workers=None):
+    """Apply compiled steps to colors of several objects in worker threads.
+
+    jobs are (colors, layers) as taken by run_stack, results are in job order.
+    Workers only touch NumPy arrays, array math releases the GIL.
+    """
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        return list(executor.map(lambda job: run_stack(job[0], steps, job[1]), jobs))
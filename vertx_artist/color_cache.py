@@ -0,0 +1,77 @@
+import os
+
+import bpy
+import numpy as np
+
+
+# Bumped when the file layout changes, older caches are ignored
+CACHE_VERSION = 1
+CACHE_SUFFIX = '.vrtxa.npz'
+
+
+def cache_path():
+    """Color cache file next to the open .blend, None if it was never saved."""
+
+    if not bpy.data.filepath:
+        return None
+
+    return bpy.data.filepath + CACHE_SUFFIX
+
+
+def write_cache(path, lookup, fingerprints, active_color):
+    """Write palette and corner color ids of meshes with a fingerprint.
+
+    Color ids are stored in the smallest integer type fitting the palette.
+    """
+
+    mesh_names = [x for x in lookup.meshes if x in fingerprints]
+    color_ids = [lookup.meshes[x].color_ids for x in mesh_names]
+    id_type = np.min_scalar_type(max(len(lookup.colors) - 1, 0))
+
+    # Write a temporary file first, an interrupted save keeps the old cache
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        np.savez(
+            f,
+            version=np.int64(CACHE_VERSION),
+            colors=np.array(lookup.colors, dtype=np.float64).reshape(-1, 3),
+            mesh_names=np.array(mesh_names, dtype=str),
+            fingerprints=np.array([fingerprints[x] for x in mesh_names], dtype=str),
+            corner_counts=np.array([len(x) for x in color_ids], dtype=np.int64),
+            color_ids=np.concatenate(color_ids).astype(id_type) if color_ids else np.zeros(0, dtype=id_type),
+            active_color=np.int64(-1 if active_color is None else active_color)
+        )
+
+    os.replace(temp_path, path)
+
+
+def read_cache(path):
+    """Palette, active color id and mesh name: (fingerprint, color ids) of a cache file.
+
+    None if the file is missing, unreadable or of another version.
+    """
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != CACHE_VERSION:
+                return None
+
+            palette = data['colors']
+            active_color = int(data['active_color'])
+            mesh_names = data['mesh_names'].tolist()
+            fingerprints = data['fingerprints'].tolist()
+            corner_counts = data['corner_counts']
+            color_ids = data['color_ids'].astype(np.uint32)
+
+    except (OSError, KeyError, ValueError):
+        return None
+
+    if corner_counts.sum() != len(color_ids) or (len(color_ids) and color_ids.max() >= len(palette)):
+        return None
+
+    meshes = {
+        mesh_name: (fingerprint, ids)
+        for mesh_name, fingerprint, ids in zip(mesh_names, fingerprints, np.split(color_ids, np.cumsum(corner_counts)[:-1]))
+    }
+
+    return palette, active_color, meshes
@@ -0,0 +1,414 @@
+import bisect
+import colorsys
+
+import numpy as np
+
+from .color_math import rgb_to_hsv_array
+
+
+# Colors are compared after rounding to 5 decimals
+COLOR_PRECISION = 5
+COLOR_SCALE = 10 ** COLOR_PRECISION
+
+
+def color_keys(rgb):
+    """Quantize (N, 3) RGB array to integer keys."""
+
+    return np.rint(np.asarray(rgb, dtype=np.float64) * COLOR_SCALE).astype(np.int64)
+
+
+def pack_keys(keys):
+    """Pack (N, 3) integer keys into a single int64 per row, if they fit."""
+
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    low = keys.min(axis=0)
+    span = keys.max(axis=0) - low + 1
+    if np.prod(span.astype(np.float64)) >= 2 ** 62:
+        return None
+
+    shifted = keys - low
+    return (shifted[:, 0] * span[1] + shifted[:, 1]) * span[2] + shifted[:, 2]
+
+
+def unique_keys(keys):
+    """Distinct rows of (N, 3) integer keys, and index of every row into them."""
+
+    packed = pack_keys(keys)
+
+    if packed is None:
+        distinct, inverse = np.unique(keys, axis=0, return_inverse=True)
+    else:
+        _, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
+        distinct = keys[first]
+
+    return distinct, inverse.reshape(-1)
+
+
+def quantize_colors(rgb):
+    """Find distinct rounded colors.
+
+    Returns (palette, inverse), where palette is (K, 3) array of rounded colors,
+    and inverse maps every input row to its palette index.
+    """
+
+    palette_keys, inverse = unique_keys(color_keys(rgb))
+
+    return palette_keys / COLOR_SCALE, inverse
+
+
+def hsv_sort_order(palette):
+    """Palette indices sorted by HSV, same as sorting by colorsys.rgb_to_hsv."""
+
+    hsv = rgb_to_hsv_array(palette)
+    return np.lexsort((hsv[:, 2], hsv[:, 1], hsv[:, 0]))
+
+
+class ObjectColorIndex:
+    """Color id of every corner of one object, with corners grouped by color id.
+
+    Corners of color k are corner_order[offsets[k]:offsets[k + 1]]. Corners
+    reassigned since grouping are kept in moved, until there are enough of
+    them to regroup everything.
+    """
+
+    def __init__(self, color_ids, color_count, loop_vertex_index):
+        self.color_ids = np.asarray(color_ids, dtype=np.uint32)
+        self.loop_vertex_index = loop_vertex_index
+        self.group_corners(color_count)
+
+    def group_corners(self, color_count):
+        self.corner_order = np.argsort(self.color_ids, kind='stable').astype(np.uint32)
+
+        self.color_counts = np.bincount(self.color_ids, minlength=color_count).astype(np.int64)
+        self.offsets = np.zeros(len(self.color_counts) + 1, dtype=np.int64)
+        np.cumsum(self.color_counts, out=self.offsets[1:])
+
+        self.moved = {}
+        self.moved_count = 0
+        self.stale = set()
+
+    def grow(self, color_count):
+        if len(self.color_counts) < color_count:
+            self.color_counts = np.concatenate((
+                self.color_counts,
+                np.zeros(color_count - len(self.color_counts), dtype=np.int64)
+            ))
+
+    def corners(self, color_id):
+        """All corners of color."""
+
+        if color_id + 1 < len(self.offsets):
+            corners = self.corner_order[self.offsets[color_id]:self.offsets[color_id + 1]]
+        else:
+            corners = np.zeros(0, dtype=np.uint32)
+
+        # Drop corners that moved away, add corners that moved in
+        if color_id in self.stale:
+            corners = corners[self.color_ids[corners] == color_id]
+
+        if color_id in self.moved:
+            moved = np.concatenate(self.moved[color_id])
+            moved = moved[self.color_ids[moved] == color_id]
+            corners = np.unique(np.concatenate((corners, moved)))
+
+        return corners
+
+    def count(self, color_id):
+        if color_id >= len(self.color_counts):
+            return 0
+
+        return int(self.color_counts[color_id])
+
+    def counts(self, color_count):
+        self.grow(color_count)
+        return self.color_counts[:color_count]
+
+    def reassign(self, corners, color_ids):
+        """Set color ids of unique corners, return their old color ids."""
+
+        old_color_ids = self.color_ids[corners]
+        self.color_ids[corners] = color_ids
+
+        self.grow(int(color_ids.max()) + 1)
+        np.subtract.at(self.color_counts, old_color_ids, 1)
+        np.add.at(self.color_counts, color_ids, 1)
+
+        self.stale.update(np.unique(old_color_ids).tolist())
+
+        order = np.argsort(color_ids, kind='stable')
+        sorted_ids = color_ids[order]
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        for color_id, group in zip(sorted_ids[starts].tolist(), np.split(corners[order], starts[1:])):
+            self.moved.setdefault(color_id, []).append(group.astype(np.uint32))
+
+        self.moved_count += len(corners)
+        if self.moved_count > len(self.color_ids) // 4:
+            self.group_corners(len(self.color_counts))
+
+        return old_color_ids
+
+
+class HSVIndex:
+    """HSV of colors sorted by hue, to find colors within HSV tolerance.
+
+    Hue is circular, a hue window around 0 or 1 wraps to the other end.
+    """
+
+    def __init__(self, colors, color_ids):
+        color_ids = np.asarray(color_ids, dtype=np.int64)
+        hsv = rgb_to_hsv_array(np.array([colors[x] for x in color_ids.tolist()], dtype=np.float64).reshape(-1, 3))
+
+        order = np.argsort(hsv[:, 0], kind='stable')
+        self.color_ids = color_ids[order]
+        self.hsv = hsv[order]
+
+    def query(self, hsv, tolerance, ignore=(False, False, False)):
+        """Color ids within tolerance of hsv in every channel not ignored."""
+
+        if ignore[0] or tolerance >= 0.5:
+            candidates = np.arange(len(self.hsv))
+        else:
+            # Slightly wider window, candidates are compared exactly below
+            low = hsv[0] - tolerance - 1e-9
+            high = hsv[0] + tolerance + 1e-9
+            windows = [(low, high), (low + 1, high + 1), (low - 1, high - 1)]
+
+            hues = self.hsv[:, 0]
+            candidates = np.concatenate([
+                np.arange(np.searchsorted(hues, start, 'left'), np.searchsorted(hues, stop, 'right'))
+                for start, stop in windows
+            ])
+
+        candidate_hsv = self.hsv[candidates]
+        match = np.ones(len(candidates), dtype=bool)
+
+        if not ignore[0]:
+            h_diff = np.abs(hsv[0] - candidate_hsv[:, 0])
+            match &= np.minimum(h_diff, 1.0 - h_diff) <= tolerance
+
+        if not ignore[1]:
+            match &= np.abs(hsv[1] - candidate_hsv[:, 1]) <= tolerance
+
+        if not ignore[2]:
+            match &= np.abs(hsv[2] - candidate_hsv[:, 2]) <= tolerance
+
+        return self.color_ids[candidates[match]]
+
+
+class ColorLookup:
+    """Distinct colors of refreshed objects, and the corner index of every mesh.
+
+    Color ids index into colors, ids maps quantized colors to their color id,
+    order lists color ids as displayed in Object Colors. Corner indices are
+    keyed by mesh name, linked duplicates share one.
+    """
+
+    def __init__(self, palette=(), meshes=None):
+        self.colors = [tuple(x) for x in palette]
+        self.ids = {key: i for i, key in enumerate(map(tuple, color_keys(np.reshape(palette, (-1, 3))).tolist()))}
+        self.meshes = {} if meshes is None else meshes
+
+        self.color_counts = np.zeros(len(self.colors), dtype=np.int64)
+        for index in self.meshes.values():
+            self.color_counts += index.counts(len(self.colors))
+
+        self.sort_colors()
+
+    def __len__(self):
+        return len(self.order)
+
+    def sort_colors(self):
+        present = np.flatnonzero(self.color_counts)
+        palette = np.array([self.colors[x] for x in present.tolist()], dtype=np.float64).reshape(-1, 3)
+
+        self.order = present[hsv_sort_order(palette)].tolist()
+        self.sort_keys = [colorsys.rgb_to_hsv(*self.colors[x]) for x in self.order]
+        self.positions = {color_id: i for i, color_id in enumerate(self.order)}
+        self.hsv_cache = None
+
+    def hsv_index(self):
+        """HSV index of displayed colors, rebuilt after they change."""
+
+        if self.hsv_cache is None:
+            self.hsv_cache = HSVIndex(self.colors, self.order)
+
+        return self.hsv_cache
+
+    def update_order(self, color_ids):
+        """Add or remove colors from display order, after their counts changed."""
+
+        removed = {x for x in color_ids if x in self.positions and self.color_counts[x] == 0}
+        added = [x for x in color_ids if x not in self.positions and self.color_counts[x] > 0]
+
+        if removed:
+            kept = [i for i, color_id in enumerate(self.order) if color_id not in removed]
+            self.order = [self.order[i] for i in kept]
+            self.sort_keys = [self.sort_keys[i] for i in kept]
+
+        for color_id in added:
+            sort_key = colorsys.rgb_to_hsv(*self.colors[color_id])
+            i = bisect.bisect_right(self.sort_keys, sort_key)
+            self.order.insert(i, color_id)
+            self.sort_keys.insert(i, sort_key)
+
+        if removed or added:
+            self.positions = {color_id: i for i, color_id in enumerate(self.order)}
+            self.hsv_cache = None
+
+    def corners(self, mesh_name, color_id):
+        if mesh_name not in self.meshes:
+            return np.zeros(0, dtype=np.uint32)
+
+        return self.meshes[mesh_name].corners(color_id)
+
+    def color_id(self, color):
+        """Id of color, or None if not present."""
+
+        return self.ids.get(tuple(color_keys([color])[0].tolist()))
+
+    def add_color(self, key):
+        """Id of quantized color, added if missing."""
+
+        color_id = self.ids.get(key)
+        if color_id is None:
+            color_id = len(self.colors)
+            self.colors.append(tuple(x / COLOR_SCALE for x in key))
+            self.ids[key] = color_id
+
+        return color_id
+
+    def add_keys(self, keys):
+        """Ids of (N, 3) quantized colors, added if missing."""
+
+        distinct, inverse = unique_keys(keys)
+        key_ids = np.array([self.add_color(key) for key in map(tuple, distinct.tolist())], dtype=np.uint32)
+
+        return key_ids[inverse]
+
+    def grow_counts(self):
+        if len(self.color_counts) < len(self.colors):
+            self.color_counts = np.concatenate((
+                self.color_counts,
+                np.zeros(len(self.colors) - len(self.color_counts), dtype=np.int64)
+            ))
+
+    def add_mesh(self, mesh_name, index, counted=False):
+        """Add corner index of a refreshed mesh, its color ids from add_keys.
+
+        counted if its corners were already added with count_corners.
+        """
+
+        self.grow_counts()
+        self.meshes[mesh_name] = index
+
+        if counted:
+            return
+
+        counts = index.counts(len(self.colors))
+        self.color_counts += counts
+
+        self.update_order(np.flatnonzero(counts).tolist())
+
+    def count_corners(self, color_ids, sign=1):
+        """Add corners of color ids to counts (remove them with sign -1), without a mesh index."""
+
+        self.grow_counts()
+
+        counts = np.bincount(color_ids, minlength=len(self.colors))
+        self.color_counts += sign * counts
+
+        self.update_order(np.flatnonzero(counts).tolist())
+
+    def remove_mesh(self, mesh_name):
+        """Remove corner index of a mesh, with its corner counts."""
+
+        index = self.meshes.pop(mesh_name, None)
+        if index is None:
+            return
+
+        self.grow_counts()
+
+        counts = index.counts(len(self.colors))
+        self.color_counts -= counts
+
+        self.update_order(np.flatnonzero(counts).tolist())
+
+    def recolor(self, color_id, color):
+        """Change color of color id, moving it to its sorted display position.
+
+        A color id already holding the new color is merged into color_id, its corners move over.
+        """
+
+        old_key = tuple(color_keys([self.colors[color_id]])[0].tolist())
+        key = tuple(color_keys([color])[0].tolist())
+
+        if self.ids.get(old_key) == color_id:
+            del self.ids[old_key]
+
+        other = self.ids.get(key, color_id)
+        self.ids[key] = color_id
+        self.colors[color_id] = tuple(x / COLOR_SCALE for x in key)
+
+        if other != color_id:
+            self.merge(other, color_id)
+
+        if color_id in self.positions:
+            i = self.positions[color_id]
+            del self.order[i]
+            del self.sort_keys[i]
+
+            sort_key = colorsys.rgb_to_hsv(*self.colors[color_id])
+            i = bisect.bisect_right(self.sort_keys, sort_key)
+            self.order.insert(i, color_id)
+            self.sort_keys.insert(i, sort_key)
+
+            self.positions = {x: i for i, x in enumerate(self.order)}
+            self.hsv_cache = None
+
+    def merge(self, color_id, into):
+        """Move all corners of color_id to color id into."""
+
+        for index in self.meshes.values():
+            if index.count(color_id):
+                corners = index.corners(color_id)
+                index.reassign(corners, np.full(len(corners), into, dtype=np.uint32))
+
+        self.grow_counts()
+        self.color_counts[into] += self.color_counts[color_id]
+        self.color_counts[color_id] = 0
+
+        self.update_order([color_id, into])
+
+    def update_corners(self, mesh_name, corners, new_color):
+        """Move corners of mesh to new color, one color or one per corner.
+
+        Only the changed corners are visited. Return new color id of every corner.
+        """
+
+        corners = np.asarray(corners, dtype=np.int64)
+        if len(corners) == 0:
+            return np.zeros(0, dtype=np.uint32)
+
+        new_colors = np.broadcast_to(np.asarray(new_color, dtype=np.float64), (len(corners), 3))
+
+        # Last write to a corner wins
+        corners, last = np.unique(corners[::-1], return_index=True)
+        new_colors = new_colors[::-1][last]
+
+        new_color_ids = self.add_keys(color_keys(new_colors))
+
+        self.grow_counts()
+
+        # Mesh was not refreshed, nothing to keep track of
+        if mesh_name not in self.meshes:
+            return new_color_ids
+
+        old_color_ids = self.meshes[mesh_name].reassign(corners, new_color_ids)
+        np.subtract.at(self.color_counts, old_color_ids, 1)
+        np.add.at(self.color_counts, new_color_ids, 1)
+
+        self.update_order(set(np.unique(old_color_ids).tolist()) | set(np.unique(new_color_ids).tolist()))
+
+        return new_color_ids
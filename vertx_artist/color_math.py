@@ -0,0 +1,113 @@
+import numpy as np
+
+
+# Gamma correction and inverse gamma correction may be reversed
+def inverse_gamma_array(c, byte_color=False):
+    """Gamma uncorrection.
+
+    Colors of byte attributes (multiples of 1 / 255) go through a lookup table.
+    """
+
+    c = np.asarray(c)
+
+    if byte_color:
+        return INVERSE_GAMMA_LUT[np.clip(np.rint(c * 255), 0, 255).astype(np.uint8)]
+
+    c = np.clip(c.astype(np.float64), 0, 1)
+
+    # float_power gives the same results as math.pow, power may differ in the last bit
+    return np.where(c < 0.04045, c / 12.92, np.float_power((c + 0.055) / 1.055, 2.4))
+
+
+def gamma_correct_array(c):
+    """Gamma correction, quantized to bytes."""
+
+    c = np.asarray(c, dtype=np.float64)
+
+    with np.errstate(invalid='ignore'):
+        c = np.where(c < 0.0031308, np.maximum(0.0, c * 12.92), 1.055 * np.float_power(c, 1.0 / 2.4) - 0.055)
+    c = np.clip(np.trunc(c * 255 + 0.5), 0, 255)
+
+    return c / 255
+
+
+# Inverse gamma of every byte value, as read from a byte attribute
+INVERSE_GAMMA_LUT = inverse_gamma_array(np.arange(256, dtype=np.float32) / np.float32(255))
+
+
+def rgb_to_hsv_array(rgb):
+    """Convert (N, 3) RGB array to HSV, matching colorsys.rgb_to_hsv."""
+
+    rgb = np.asarray(rgb, dtype=np.float64)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+
+    maxc = rgb.max(axis=-1)
+    minc = rgb.min(axis=-1)
+    rangec = maxc - minc
+    gray = rangec == 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(gray, 0.0, rangec / maxc)
+        rc = (maxc - r) / rangec
+        gc = (maxc - g) / rangec
+        bc = (maxc - b) / rangec
+
+    h = np.where(
+        r == maxc, bc - gc,
+        np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc)
+    )
+    h = np.where(gray, 0.0, (h / 6.0) % 1.0)
+
+    return np.stack((h, s, maxc), axis=-1)
+
+
+def set_restricted_colors(colors, new_color, channels):
+    """Set (N, 4) colors according to layer channel restrictions."""
+
+    colors = np.array(colors, dtype=np.float32).reshape(-1, 4)
+
+    for i, channel in enumerate("RGB"):
+        if channel in channels:
+            colors[:, i] = new_color[i]
+
+    # Value of new color, to every channel
+    if "A" == channels:
+        colors[:, :3] = max(new_color)
+
+    return colors
+
+
+def hsv_to_rgb_array(hsv):
+    """Convert (N, 3) HSV array to RGB, matching colorsys.hsv_to_rgb."""
+
+    hsv = np.asarray(hsv, dtype=np.float64)
+    h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+
+    i = np.trunc(h * 6.0)
+    f = (h * 6.0) - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    i = i.astype(np.int64) % 6
+
+    r = np.choose(i, (v, q, p, p, t, v))
+    g = np.choose(i, (t, v, v, q, p, p))
+    b = np.choose(i, (p, p, t, v, v, q))
+
+    # Gray, same as colorsys
+    gray = s == 0.0
+    return np.stack((np.where(gray, v, r), np.where(gray, v, g), np.where(gray, v, b)), axis=-1)
+
+
+def adjust_hsv_array(rgb, hue, saturation, value):
+    """Shift hue, saturation and value of (N, 3) RGB array.
+
+    Hue wraps around, saturation and value are clamped, same as AdjustHSV per corner.
+    """
+
+    hsv = rgb_to_hsv_array(rgb)
+    hsv[:, 0] = np.mod(hsv[:, 0] + hue, 1.0)
+    hsv[:, 1] = np.clip(hsv[:, 1] + saturation, 0.0, 1.0)
+    hsv[:, 2] = np.clip(hsv[:, 2] + value, 0.0, 1.0)
+
+    return hsv_to_rgb_array(hsv)
@@ -3,19 +3,164 @@ import subprocess
 import sys
 
 import blf
-import bmesh
 import bpy
 from bpy_extras import view3d_utils
 import gpu
 import gpu_extras
+from mathutils.bvhtree import BVHTree
+import numpy as np
 
-from .object_colors import gamma_correct_color
+from . import object_colors
+from .color_math import gamma_correct_array
+from .mesh_data import (
+    bulk_mesh,
+    read_array,
+    read_corner_colors,
+    select_faces,
+    select_vertices,
+    unique_mesh_objects
+)
 
 
 last_hex_color = ''
 
 
-def get_color(context, event):
+class MeshSamples:
+    """Triangles of one mesh with display colors of its corners, shared by linked duplicates."""
+
+    def __init__(self, mesh, colors):
+        self.coords = read_array(mesh.vertices, 'co', np.float32, 3).astype(np.float64)
+
+        mesh.calc_loop_triangles()
+        self.triangles = read_array(mesh.loop_triangles, 'vertices', np.int32, 3)
+        self.triangle_loops = read_array(mesh.loop_triangles, 'loops', np.int32, 3)
+        self.triangle_polygons = read_array(mesh.loop_triangles, 'polygon_index', np.int32)
+
+        self.loop_starts = read_array(mesh.polygons, 'loop_start', np.int32)
+        self.loop_totals = read_array(mesh.polygons, 'loop_total', np.int32)
+        self.colors = colors
+
+
+class ObjectSampler:
+    """Triangles of one object in world space, to sample colors of its mesh.
+
+    Built once per eyedropper session, rays are cast against the BVH tree instead of the scene.
+    """
+
+    def __init__(self, obj, samples):
+        matrix = np.array(obj.matrix_world, dtype=np.float64)
+        coords = samples.coords @ matrix[:3, :3].T + matrix[:3, 3]
+
+        self.samples = samples
+        self.triangle_coords = coords[samples.triangles]
+        self.bvh = BVHTree.FromPolygons(coords.tolist(), samples.triangles.tolist(), all_triangles=True)
+
+    def ray_cast(self, origin, direction):
+        """Distance to hit, triangle index and hit location, or None."""
+
+        location, normal, index, distance = self.bvh.ray_cast(origin, direction)
+        if index is None:
+            return None
+
+        return distance, index, location
+
+    def face_color(self, triangle):
+        """Color of face of triangle, if all its corners have the same color."""
+
+        samples = self.samples
+        polygon = samples.triangle_polygons[triangle]
+        start = samples.loop_starts[polygon]
+        corner_colors = samples.colors[start:start + samples.loop_totals[polygon]]
+
+        if np.all(corner_colors == corner_colors[0]):
+            return corner_colors[0].tolist()
+
+        return None
+
+    def interpolated_color(self, triangle, location):
+        """Corner colors of triangle, interpolated at location with barycentric weights."""
+
+        a, b, c = self.triangle_coords[triangle]
+        v0, v1, v2 = b - a, c - a, np.array(location, dtype=np.float64) - a
+
+        d00, d01, d11 = v0 @ v0, v0 @ v1, v1 @ v1
+        d20, d21 = v2 @ v0, v2 @ v1
+        denom = d00 * d11 - d01 * d01
+
+        samples = self.samples
+
+        # Degenerate triangle, use its first corner
+        if denom == 0:
+            return samples.colors[samples.triangle_loops[triangle][0]].tolist()
+
+        v = (d11 * d20 - d01 * d21) / denom
+        w = (d00 * d21 - d01 * d20) / denom
+        weights = np.clip((1.0 - v - w, v, w), 0.0, 1.0)
+
+        color = weights @ samples.colors[samples.triangle_loops[triangle]] / weights.sum()
+        return np.clip(color, 0.0, 1.0).tolist()
+
+
+def build_samplers(context):
+    """Samplers of visible mesh objects with an active corner color attribute."""
+
+    samplers = []
+    mesh_samples = {}
+
+    for obj in context.visible_objects:
+        if obj.type != 'MESH' or obj.data.color_attributes.active_color is None:
+            continue
+
+        # Linked duplicates read their mesh once
+        if obj.data.name in mesh_samples:
+            samplers.append(ObjectSampler(obj, mesh_samples[obj.data.name]))
+            continue
+
+        attribute_name = obj.data.color_attributes.active_color.name
+
+        with bulk_mesh(obj) as mesh:
+            # Edit mode shows colors as in bmesh, other modes gamma corrected
+            if context.mode == 'EDIT_MESH':
+                colors = read_corner_colors(mesh, attribute_name)
+                if colors is None:
+                    continue
+
+                colors = colors[:, :3].astype(np.float64)
+
+            else:
+                colors = read_corner_colors(mesh, attribute_name, linear=True)
+                if colors is None:
+                    continue
+
+                colors = gamma_correct_array(colors[:, :3])
+
+            mesh_samples[obj.data.name] = MeshSamples(mesh, colors)
+            samplers.append(ObjectSampler(obj, mesh_samples[obj.data.name]))
+
+    return samplers
+
+
+def build_select_targets(context):
+    """Object name, vertex count and face corner ranges of selected meshes in the color lookup."""
+
+    targets = {}
+
+    for obj in unique_mesh_objects(context.selected_objects):
+        if obj.data.name not in object_colors.color_lookup.meshes:
+            continue
+
+        with bulk_mesh(obj) as mesh:
+            targets[obj.data.name] = (
+                obj.name,
+                len(mesh.vertices),
+                read_array(mesh.polygons, 'loop_start', np.int32),
+                read_array(mesh.polygons, 'loop_total', np.int32)
+            )
+
+    return targets
+
+
+def get_color(context, event, samplers):
     """Get color from mouse position.
     First, try to raycast to get the color from the color attribute of the object,
     if it fails, get the color from the screen buffer.
@@ -31,33 +176,25 @@ def get_color(context, event):
     view_vector = view3d_utils.region_2d_to_vector_3d(region, rv3d, mouse_coord)
     ray_origin = view3d_utils.region_2d_to_origin_3d(region, rv3d, mouse_coord)
 
-    depsgraph = context.evaluated_depsgraph_get()
-    result, location, normal, index, obj, matrix = context.scene.ray_cast(depsgraph, ray_origin, view_vector)
-    color_rgb = None
+    closest = None
+    for sampler in samplers:
+        hit = sampler.ray_cast(ray_origin, view_vector)
+        if hit is not None and (closest is None or hit[0] < closest[0][0]):
+            closest = hit, sampler
 
-    # Raycast color
-    if result:
-        # Edit mode
-        if context.mode == 'EDIT_MESH':
-            bm = bmesh.from_edit_mesh(obj.data)
-            active_layer = bm.loops.layers.color.active
+    color_rgb = None
 
-            corner_colors = [list(corner[active_layer]) for corner in bm.faces[index].loops]
+    # Raycast color, from the closest hit
+    if closest is not None:
+        (distance, triangle, location), sampler = closest
 
-        # Object or vertex paint mode
+        if bpy.context.preferences.addons['vertx_artist'].preferences.eyedropper_sampling == 'INTERPOLATE':
+            color_rgb = sampler.interpolated_color(triangle, location)
         else:
-            color_attribute = obj.data.color_attributes.active_color
-            corner_colors = [list(color_attribute.data[i].color) for i in obj.data.polygons[index].loop_indices]
-
-        # If all colors are the same, use that color
-        if all(corner_colors[0] == corner_colors[i] for i in range(1, len(corner_colors))):
-            color_rgb = corner_colors[0][:3]
-
-        if context.mode != 'EDIT_MESH' and color_rgb is not None:
-            color_rgb = gamma_correct_color(color_rgb)
+            color_rgb = sampler.face_color(triangle)
 
     # Pixel color
-    if not result or color_rgb is None:
+    if color_rgb is None:
         fb = gpu.state.active_framebuffer_get()
         screen_buffer = fb.read_color(event.mouse_x, event.mouse_y, 1, 1, 3, 0, 'FLOAT')
         color_rgb = screen_buffer.to_list()[0][0]
@@ -115,6 +252,11 @@ class VRTXA_OT_Eyedropper(bpy.types.Operator):
     handle = None
 
     mouse_position = ()
+    sample_position = None
+    samplers = []
+    select_targets = {}
+    pending_selection = {}
+    deselect_all = False
     color_rgb = (1.0, 1.0, 1.0)
     color_hex = 'FFFFFF'
 
@@ -162,6 +304,72 @@ class VRTXA_OT_Eyedropper(bpy.types.Operator):
         blf.disable(font_id, blf.ROTATION)
         blf.disable(font_id, blf.WORD_WRAP)
 
+    def select_color(self, context, color, additive):
+        """Add elements matching color to pending selection, replacing it unless additive."""
+
+        color_lookup = object_colors.color_lookup
+        color_id = color_lookup.color_id(color)
+        if color_id not in color_lookup.positions:
+            return
+
+        if not additive:
+            self.pending_selection = {}
+            self.deselect_all = True
+
+        matching = object_colors.matching_colors(color, object_colors.DEFAULT_HSV_TOLERANCE, (False, False, False))
+        selection_tolerance = bpy.context.preferences.addons['vertx_artist'].preferences.selection_tolerance
+        select_mode = tuple(context.tool_settings.mesh_select_mode)
+
+        for mesh_name, (obj_name, vert_count, loop_starts, loop_totals) in self.select_targets.items():
+            index = color_lookup.meshes.get(mesh_name)
+            if index is None or index.count(color_id) == 0:
+                continue
+
+            vert_select, face_select = self.pending_selection.get(mesh_name, (None, None))
+
+            # vert mode or edge mode
+            if select_mode[0] or select_mode[1]:
+                matched = object_colors.match_vertices(index, vert_count, color_id, matching, selection_tolerance, False)
+                vert_select = matched if vert_select is None else vert_select | matched
+
+            # face mode
+            if select_mode[2] and len(loop_starts):
+                matched = object_colors.match_faces(index, loop_starts, loop_totals, matching, selection_tolerance)
+                face_select = matched if face_select is None else face_select | matched
+
+            self.pending_selection[mesh_name] = (vert_select, face_select)
+
+        position = object_colors.displayed_position(color_id)
+        if position is not None:
+            bpy.context.scene.vrtxa_active_color_index = position
+
+    def apply_selection(self, context):
+        """Write pending selection of all clicks at once."""
+
+        if self.deselect_all:
+            bpy.ops.mesh.select_all(action='DESELECT')
+
+        select_mode = tuple(context.tool_settings.mesh_select_mode)
+
+        for mesh_name, (vert_select, face_select) in self.pending_selection.items():
+            obj = bpy.data.objects.get(self.select_targets[mesh_name][0])
+            if obj is None:
+                continue
+
+            with bulk_mesh(obj) as mesh:
+                if vert_select is not None:
+                    select_vertices(obj, mesh, read_array(mesh.vertices, 'select', bool) | vert_select, select_mode[1])
+
+                if face_select is not None:
+                    select_faces(obj, mesh, read_array(mesh.polygons, 'select', bool) | face_select)
+
+        self.pending_selection = {}
+        self.deselect_all = False
+
+    def cancel_selection(self):
+        self.pending_selection = {}
+        self.deselect_all = False
+
     def execute(self, context):
         global eyedropper_running
 
@@ -170,6 +378,9 @@ class VRTXA_OT_Eyedropper(bpy.types.Operator):
 
         bpy.types.SpaceView3D.draw_handler_remove(self.handle, 'WINDOW')
         self.handle = None
+        self.samplers = []
+
+        self.apply_selection(context)
         for a in bpy.context.screen.areas:
             a.tag_redraw()
 
@@ -181,33 +392,36 @@ class VRTXA_OT_Eyedropper(bpy.types.Operator):
         self.mouse_position = (event.mouse_region_x, event.mouse_region_y)
 
         if not context.area or not eyedropper_running:
+            self.cancel_selection()
             self.execute(context)
             return {'CANCELLED'}
 
         context.area.tag_redraw()
         context.window.cursor_set('EYEDROPPER')
-        
-        self.color_rgb, self.color_hex = get_color(context, event)
+
+        # Sample again only after the mouse moved more than a pixel
+        if self.sample_position is None or max(abs(self.mouse_position[0] - self.sample_position[0]), abs(self.mouse_position[1] - self.sample_position[1])) > 1:
+            self.color_rgb, self.color_hex = get_color(context, event, self.samplers)
+            self.sample_position = self.mouse_position
 
         if event.value == 'RELEASE':
             if event.type in ['RIGHTMOUSE', 'ESC']:
+                self.cancel_selection()
                 self.execute(context)
                 return {'CANCELLED'}
 
+            # Shift click keeps the eyedropper running, to select more colors
+            if event.type in ['LEFT_SHIFT', 'RIGHT_SHIFT'] or (event.type == 'LEFTMOUSE' and event.shift):
+                return {'PASS_THROUGH'}
+
             self.execute(context)
             return {"FINISHED"}
 
         bpy.context.scene.vrtxa_static_color = self.color_rgb
 
-        # select object colors with same color
-        if event.type == 'LEFTMOUSE' and event.value == 'PRESS':
-            bpy.ops.vertx_artist.select_by_color(
-                'INVOKE_DEFAULT',
-                selection_tolerance=bpy.context.preferences.addons['vertx_artist'].preferences.selection_tolerance,
-                select_color=bpy.context.scene.vrtxa_static_color,
-                select_color_idx=-1,
-                ignore_hue=False, ignore_saturation=False, ignore_value=False,
-            )
+        # select object colors with same color, shift adds to selection
+        if event.type == 'LEFTMOUSE' and event.value == 'PRESS' and context.mode == 'EDIT_MESH':
+            self.select_color(context, bpy.context.scene.vrtxa_static_color, event.shift)
 
         return {'PASS_THROUGH'}
 
@@ -220,6 +434,11 @@ class VRTXA_OT_Eyedropper(bpy.types.Operator):
 
         else:
             self.start_pos = (event.mouse_x, event.mouse_y)
+            self.samplers = build_samplers(context)
+            self.sample_position = None
+            self.select_targets = build_select_targets(context) if context.mode == 'EDIT_MESH' else {}
+            self.pending_selection = {}
+            self.deselect_all = False
             context.window.cursor_set('EYEDROPPER')
             self.handle = bpy.types.SpaceView3D.draw_handler_add(
                 self.draw_eyedropper, (),
@@ -1,17 +1,20 @@
-import colorsys
+from collections import Counter
+import time
 
 import bpy
-import bmesh
 from bpy.app.handlers import persistent
+import numpy as np
 
-from .object_colors import gamma_correct, inverse_gamma
+from . import eyedropper, object_colors
+from .color_math import gamma_correct_array, inverse_gamma_array
+from .mesh_data import bulk_mesh, mesh_objects, read_corner_colors, write_corner_colors
 from .tools import on_name_update, col_attr_exists
 from .transformations import refresh_default_material
 
 
 class VRTXA_GROUP_Layer(bpy.types.PropertyGroup):
     def on_layer_name_update(self, context):
-        on_name_update(self, [i.name for i in context.view_layer.objects.active.vrtxa_layers], "Attribute")
+        on_name_update(self, [i.name for i in self.id_data.vrtxa_layers], "Attribute")
     name: bpy.props.StringProperty(
         name='name',
         description='Name of the layer',
@@ -114,128 +117,57 @@ def combine_layers(
         return None
 
     new_layer_name = color_attribute.name
-    color_attributes = [None] * 4
     layers = bpy.context.view_layer.objects.active.vrtxa_layers
 
-    def combine_layers_bmesh():
-        color_attribute = bm.loops.layers.color.get(new_layer_name)
-        for channel in channels_list:
-            for i in range(4):
-                if channel == channels_list[i]:
-                    color_attributes[i] = bm.loops.layers.color.get(channel)
-
-        def color_map(corner, j: int):
-            if color_attributes[j] is None:
-                return channels_values[j]
-
-            if j < 3:
-                return corner[color_attributes[j]][j]
-
-            if layers[channels_list[j]].channels == "A":
-                obj_color = tuple(corner[color_attributes[j]])[:-1]
-                obj_hsv_color = colorsys.rgb_to_hsv(*obj_color)
-                return obj_hsv_color[2]
-
-            if channels == "A":
-                return corner[color_attributes[j]][3]
+    # Edit mode works with colors as in bmesh, other modes with linear colors
+    linear = bpy.context.mode != "EDIT_MESH"
+    byte_color = not linear and color_attribute.data_type == 'BYTE_COLOR'
 
-            return corner[color_attributes[j]][j]
+    with bulk_mesh(obj) as mesh:
+        corner_colors = read_corner_colors(mesh, new_layer_name, linear)
+        if corner_colors is None:
+            return None
 
-        if channels == "A":
-            for vert in bm.verts:
-                for corner in vert.link_loops:
-                    for j in range(3):
-                        corner[color_attribute][j] = color_map(corner, 3)
-
-            if channels_gamma[3] == "Gamma":
-                for vert in bm.verts:
-                    for corner in vert.link_loops:
-                        for j in range(3):
-                            corner[color_attribute][j] = gamma_correct(corner[color_attribute][j])
-
-            if channels_gamma[3] == "Inverse":
-                for vert in bm.verts:
-                    for corner in vert.link_loops:
-                        for j in range(3):
-                            corner[color_attribute][j] = inverse_gamma(corner[color_attribute][j])
-
-            return
+        # Every source layer is read once
+        source_colors = {}
+        for channel in channels_list:
+            if channel not in source_colors:
+                source_colors[channel] = read_corner_colors(mesh, channel, linear)
 
-        for vert in bm.verts:
-            for corner in vert.link_loops:
-                for j in range(4):
-                    corner[color_attribute][j] = color_map(corner, j)
-
-        for j in range(4):
-            if channels_gamma[j] == "Gamma":
-                for vert in bm.verts:
-                    for corner in vert.link_loops:
-                        corner[color_attribute][j] = gamma_correct(corner[color_attribute][j])
-
-            if channels_gamma[j] == "Inverse":
-                for vert in bm.verts:
-                    for corner in vert.link_loops:
-                        corner[color_attribute][j] = inverse_gamma(corner[color_attribute][j])
-
-    def combine_layers_bpy():
-        for col_attribute in obj.data.color_attributes:
-            for i in range(4):
-                if col_attribute.name == channels_list[i]:
-                    color_attributes[i] = col_attribute
-
-        def color_map(i: int, j: int):
-            if color_attributes[j] is None:
+        def color_map(j: int):
+            colors = source_colors[channels_list[j]]
+            if colors is None:
                 return channels_values[j]
 
             if j < 3:
-                return color_attributes[j].data[i].color[j]
+                return colors[:, j]
 
-            if layers[color_attributes[j].name].channels == "A":
-                obj_color = tuple(color_attributes[j].data[i].color)[:-1]
-                obj_hsv_color = colorsys.rgb_to_hsv(*obj_color)
-                return obj_hsv_color[2]
-
-            if channels == "A":
-                return color_attributes[j].data[i].color[3]
+            # Value of alpha layer, as in HSV
+            if layers[channels_list[j]].channels == "A":
+                return colors[:, :3].max(axis=1)
 
-            return color_attributes[j].data[i].color[j]
+            return colors[:, 3]
 
         if channels == "A":
-            for i, l in enumerate(obj.data.loops):
-                for j in range(3):
-                    color_attribute.data[i].color[j] = color_map(i, 3)
-
-            if channels_gamma[3] == "Gamma":
-                for i, l in enumerate(obj.data.loops):
-                    for j in range(3):
-                        color_attribute.data[i].color[j] = gamma_correct(color_attribute.data[i].color[j])
-
-            if channels_gamma[3] == "Inverse":
-                for i, l in enumerate(obj.data.loops):
-                    for j in range(3):
-                        color_attribute.data[i].color[j] = inverse_gamma(color_attribute.data[i].color[j])
+            corner_colors[:, :3] = np.reshape(color_map(3), (-1, 1))
+            channels_gamma = [channels_gamma[3]] * 3 + ["None"]
+        else:
+            for j in range(4):
+                corner_colors[:, j] = color_map(j)
 
-            return
+        if any(x != "None" for x in channels_gamma):
+            # Gamma applies to colors as stored in the layer
+            if byte_color:
+                corner_colors = np.clip(np.floor(corner_colors * 255 + 0.5), 0, 255) / 255
 
-        for i, l in enumerate(obj.data.loops):
             for j in range(4):
-                color_attribute.data[i].color[j] = color_map(i, j)
-
-        for j in range(4):
-            if channels_gamma[j] == "Gamma":
-                for i, l in enumerate(obj.data.loops):
-                    color_attribute.data[i].color[j] = gamma_correct(color_attribute.data[i].color[j])
+                if channels_gamma[j] == "Gamma":
+                    corner_colors[:, j] = gamma_correct_array(corner_colors[:, j])
 
-            if channels_gamma[j] == "Inverse":
-                for i, l in enumerate(obj.data.loops):
-                    color_attribute.data[i].color[j] = inverse_gamma(color_attribute.data[i].color[j])
+                if channels_gamma[j] == "Inverse":
+                    corner_colors[:, j] = inverse_gamma_array(corner_colors[:, j], byte_color)
 
-    if bpy.context.mode == "EDIT_MESH":
-        bm = bmesh.from_edit_mesh(obj.data)
-        combine_layers_bmesh()
-        bmesh.update_edit_mesh(obj.data)
-    else:
-        combine_layers_bpy()
+        write_corner_colors(obj, mesh, new_layer_name, corner_colors, linear)
 
 
 class VRTXA_OT_AddLayer(bpy.types.Operator):
@@ -347,33 +279,138 @@ class VRTXA_OT_SynchronizeLayers(bpy.types.Operator):
     bl_options = {"REGISTER", "UNDO"}
 
     def execute(self, context):
-        refresh_layers()
+        obj = bpy.context.view_layer.objects.active
+        if obj is not None and obj.type == 'MESH':
+            sync_layers(obj)
+
+        return {"FINISHED"}
+
+
+def sync_layers(obj, channels=None):
+    """Match layers of object to its color attributes, in one pass.
+
+    Layers of renamed attributes are renamed, keeping their channels, new layers
+    take channels by name from channels, if given. Layers end up in attribute order.
+    Return True, if anything changed.
+    """
+
+    attribute_names = [x.name for x in obj.data.color_attributes]
+    layer_names = [x.name for x in obj.vrtxa_layers]
+
+    if attribute_names == layer_names:
+        return False
+
+    attribute_set = set(attribute_names)
+    layer_set = set(layer_names)
+
+    missing = [x for x in attribute_names if x not in layer_set]
+    extra = [i for i, x in enumerate(layer_names) if x not in attribute_set]
+
+    # Renamed attributes
+    for i, name in zip(extra, missing):
+        obj.vrtxa_layers[i].name = name
+        layer_names[i] = name
+
+    for i in reversed(extra[len(missing):]):
+        obj.vrtxa_layers.remove(i)
+        del layer_names[i]
+
+    for name in missing[len(extra):]:
+        new_layer = obj.vrtxa_layers.add()
+        new_layer.name = name
+        if channels is not None and name in channels:
+            new_layer.channels = channels[name]
+        layer_names.append(name)
+
+    # Layers are indexed same as attributes
+    for i, name in enumerate(attribute_names):
+        j = layer_names.index(name, i)
+        if j != i:
+            obj.vrtxa_layers.move(j, i)
+            layer_names.insert(i, layer_names.pop(j))
+
+    return True
+
+
+def sync_duplicate_layers(group):
+    """Synchronize layers of linked duplicates with the first object of group, which was processed."""
+
+    channels = {layer.name: layer.channels for layer in group[0].vrtxa_layers}
+    for obj in group[1:]:
+        sync_layers(obj, channels)
+
+
+def sync_objects_layers(objects):
+    """Synchronize layers of all mesh objects, callable without UI.
+
+    New layers take the channels most objects use for a layer of the same name.
+    Return seconds spent on every object, and names of changed objects.
+    """
+
+    objects = [x for x in objects if x.type == 'MESH']
+
+    channel_counts = {}
+    for obj in objects:
+        for layer in obj.vrtxa_layers:
+            channel_counts.setdefault(layer.name, Counter())[layer.channels] += 1
+
+    channels = {name: counts.most_common(1)[0][0] for name, counts in channel_counts.items()}
+
+    timings = {}
+    changed = []
+    for obj in objects:
+        start = time.perf_counter()
+        if sync_layers(obj, channels):
+            changed.append(obj.name)
+        timings[obj.name] = time.perf_counter() - start
+
+    return timings, changed
+
+
+class VRTXA_OT_SynchronizeSceneLayers(bpy.types.Operator):
+    bl_idname = "vertx_artist.synchronize_scene_layers"
+    bl_label = "Synchronize All Layers"
+    bl_description = "Synchronize VertX Artist Color Layers with Color Attributes of all objects in scene, or in collection"
+    bl_options = {"REGISTER", "UNDO"}
+
+    collection: bpy.props.StringProperty(name='collection', description='Collection to synchronize, whole scene if empty', default='')
+
+    def execute(self, context):
+        if self.collection:
+            collection = bpy.data.collections.get(self.collection)
+            if collection is None:
+                self.report({'WARNING'}, message=f'Collection "{self.collection}" not found')
+                return {"CANCELLED"}
+
+            objects = collection.all_objects
+        else:
+            objects = context.scene.objects
+
+        timings, changed = sync_objects_layers(objects)
+
+        for obj_name, seconds in timings.items():
+            print(f'VertX Artist: {obj_name} synchronized in {seconds * 1000:.2f} ms')
+
+        self.report({'INFO'}, message=f'Synchronized {len(changed)} of {len(timings)} objects in {sum(timings.values()):.3f} s')
+
         return {"FINISHED"}
 
 
 @persistent
-def refresh_layers(dummy):
-    if bpy.context.object is  None:
+def refresh_layers(scene, depsgraph):
+    # Modal operators only write colors, attributes stay the same
+    if eyedropper.eyedropper_running or object_colors.hsv_preview_running:
         return
 
-    # same size
-    if len(bpy.context.object.data.color_attributes) == len(bpy.context.view_layer.objects.active.vrtxa_layers):
-        for i in range(len(bpy.context.object.data.color_attributes)):
-            if bpy.context.object.data.color_attributes[i].name not in bpy.context.view_layer.objects.active.vrtxa_layers:
-                bpy.context.view_layer.objects.active.vrtxa_layers[i].name = bpy.context.object.data.color_attributes[i].name
-                return
+    obj = bpy.context.view_layer.objects.active
+    if obj is None or obj.type != 'MESH':
+        return
 
-    if len(bpy.context.object.data.color_attributes) > len(bpy.context.view_layer.objects.active.vrtxa_layers):
-        for i in range(len(bpy.context.object.data.color_attributes)):
-            if bpy.context.object.data.color_attributes[i].name not in bpy.context.view_layer.objects.active.vrtxa_layers:
-                new_layer = bpy.context.view_layer.objects.active.vrtxa_layers.add()
-                new_layer.name = bpy.context.object.data.color_attributes[i].name
-                return
+    # Attributes change only with updates of the mesh, or the object
+    if not any(update.id.original in {obj, obj.data} for update in depsgraph.updates):
+        return
 
-    for i in range(len(bpy.context.view_layer.objects.active.vrtxa_layers)):
-        if bpy.context.view_layer.objects.active.vrtxa_layers[i].name not in bpy.context.object.data.color_attributes:
-            bpy.context.view_layer.objects.active.vrtxa_layers.remove(i)
-            return
+    sync_layers(obj)
 
 
 class VRTXA_UL_DisplayLayers(bpy.types.UIList):
@@ -420,6 +457,7 @@ class VRTXA_PT_ColorLayers(bpy.types.Panel):
             row.label(text=f'VertX Artist Color Layers: {len(bpy.context.view_layer.objects.active.vrtxa_layers)}, Color Attributes: {len(bpy.context.object.data.color_attributes)}')
             row.alert = True
             row.operator('vertx_artist.synchronize_layers', text='Refresh', icon='FILE_REFRESH')
+            row.operator('vertx_artist.synchronize_scene_layers', text='Refresh All', icon='FILE_REFRESH')
 
         row = layout.row()
         row.template_list('VRTXA_UL_DisplayLayers', '', bpy.context.view_layer.objects.active, 'vrtxa_layers', bpy.context.object.data.color_attributes, 'active_color_index')
@@ -507,8 +545,9 @@ class VRTXA_OT_ExtractAlpha(bpy.types.Operator):
     def execute(self, context):
         active_obj = bpy.context.view_layer.objects.active
 
-        for obj in bpy.context.view_layer.objects.selected:
-            bpy.context.view_layer.objects.active = obj
+        # Linked duplicates share attributes, every mesh once
+        for group in mesh_objects(bpy.context.view_layer.objects.selected).values():
+            bpy.context.view_layer.objects.active = group[0]
 
             if len(bpy.context.view_layer.objects.active.vrtxa_layers) == 0:
                 bpy.ops.geometry.color_attribute_add(name='Attribute', domain='CORNER', data_type='BYTE_COLOR')
@@ -520,6 +559,8 @@ class VRTXA_OT_ExtractAlpha(bpy.types.Operator):
                     a_channel=bpy.context.view_layer.objects.active.vrtxa_layers[bpy.context.object.data.color_attributes.active_color_index].name,
                 )
 
+            sync_duplicate_layers(group)
+
         bpy.context.view_layer.objects.active = active_obj
         bpy.ops.vertx_artist.refresh('INVOKE_DEFAULT')
 
@@ -537,8 +578,9 @@ class VRTXA_OT_Bake_Alpha(bpy.types.Operator):
     def execute(self, context):
         active_obj = bpy.context.view_layer.objects.active
 
-        for obj in bpy.context.view_layer.objects.selected:
-            bpy.context.view_layer.objects.active = obj
+        # Linked duplicates share attributes, every mesh once
+        for group in mesh_objects(bpy.context.view_layer.objects.selected).values():
+            bpy.context.view_layer.objects.active = group[0]
 
             if len(bpy.context.view_layer.objects.active.vrtxa_layers) == 0:
                 bpy.ops.geometry.color_attribute_add(name='Attribute', domain='CORNER', data_type='BYTE_COLOR')
@@ -546,6 +588,8 @@ class VRTXA_OT_Bake_Alpha(bpy.types.Operator):
             if bpy.context.view_layer.objects.active.vrtxa_layers[bpy.context.object.data.color_attributes.active_color_index].channels == 'A':
                 bake_alpha(self.layer_name)
 
+            sync_duplicate_layers(group)
+
         bpy.context.view_layer.objects.active = active_obj
         bpy.ops.vertx_artist.refresh('INVOKE_DEFAULT')
 
@@ -596,6 +640,7 @@ def register():
     bpy.utils.register_class(VRTXA_OT_ToggleRenderColorLayer)
     bpy.utils.register_class(VRTXA_OT_AddLayer)
     bpy.utils.register_class(VRTXA_OT_SynchronizeLayers)
+    bpy.utils.register_class(VRTXA_OT_SynchronizeSceneLayers)
     bpy.utils.register_class(VRTXA_OT_SelectRGBALayer)
     bpy.utils.register_class(VRTXA_OT_ExtractAlpha)
     bpy.utils.register_class(VRTXA_OT_Bake_Alpha)
@@ -617,6 +662,7 @@ def unregister():
     bpy.utils.unregister_class(VRTXA_OT_ToggleRenderColorLayer)
     bpy.utils.unregister_class(VRTXA_OT_AddLayer)
     bpy.utils.unregister_class(VRTXA_OT_SynchronizeLayers)
+    bpy.utils.unregister_class(VRTXA_OT_SynchronizeSceneLayers)
     bpy.utils.unregister_class(VRTXA_OT_SelectRGBALayer)
     bpy.utils.unregister_class(VRTXA_OT_ExtractAlpha)
     bpy.utils.unregister_class(VRTXA_OT_Bake_Alpha)
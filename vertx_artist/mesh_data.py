@@ -0,0 +1,270 @@
+from contextlib import contextmanager
+import hashlib
+
+import bpy
+import bmesh
+import numpy as np
+
+
+@contextmanager
+def bulk_mesh(obj):
+    """Mesh data of object, readable in bulk also in edit mode.
+
+    Attribute arrays of a mesh in edit mode are empty, so edit-mode data is
+    read from a temporary copy, removed on exit.
+    """
+
+    if obj.mode != 'EDIT':
+        yield obj.data
+        return
+
+    mesh = bpy.data.meshes.new(obj.data.name)
+    bmesh.from_edit_mesh(obj.data).to_mesh(mesh)
+
+    try:
+        yield mesh
+    finally:
+        bpy.data.meshes.remove(mesh)
+
+
+def mesh_objects(objects):
+    """Mesh objects grouped by mesh name, in order.
+
+    Linked duplicates share one mesh, mesh data of the group is processed once.
+    """
+
+    groups = {}
+    for obj in objects:
+        if obj.type == 'MESH':
+            groups.setdefault(obj.data.name, []).append(obj)
+
+    return groups
+
+
+def unique_mesh_objects(objects):
+    """First mesh object of every mesh."""
+
+    return [group[0] for group in mesh_objects(objects).values()]
+
+
+def color_property(attribute):
+    """Attribute value property holding the stored color, as seen from bmesh."""
+
+    return 'color_srgb' if attribute.data_type == 'BYTE_COLOR' else 'color'
+
+
+def read_corner_colors(mesh, attribute_name, linear=False):
+    """Read face corner colors of a color attribute into (N, 4) array.
+
+    Colors are as seen from bmesh, or linear colors if linear is set.
+    """
+
+    attribute = mesh.color_attributes.get(attribute_name)
+    if attribute is None or attribute.domain != 'CORNER':
+        return None
+
+    buffer = np.empty(len(attribute.data) * 4, dtype=np.float32)
+    attribute.data.foreach_get('color' if linear else color_property(attribute), buffer)
+
+    return buffer.reshape(-1, 4)
+
+
+def mesh_fingerprint(mesh, attribute_name):
+    """Hash of stored colors of a color attribute and of the mesh topology counts, None if missing."""
+
+    colors = read_corner_colors(mesh, attribute_name)
+    if colors is None:
+        return None
+
+    digest = hashlib.blake2b(colors, digest_size=16)
+    digest.update(fingerprint_tail(mesh, attribute_name))
+
+    return digest.hexdigest()
+
+
+def fingerprint_tail(mesh, attribute_name):
+    """Topology counts and attribute name, hashed after the colors.
+
+    Colors may be hashed in chunks, blake2b(colors) updated with the tail is the mesh fingerprint.
+    """
+
+    counts = np.array((len(mesh.vertices), len(mesh.edges), len(mesh.polygons), len(mesh.loops)), dtype=np.int64)
+    return counts.tobytes() + attribute_name.encode()
+
+
+def bmesh_color_layer(bm, attribute):
+    """Loop layer of a color attribute in bmesh."""
+
+    layers = bm.loops.layers.float_color if attribute.data_type == 'FLOAT_COLOR' else bm.loops.layers.color
+    return layers.get(attribute.name)
+
+
+def write_corner_colors(obj, mesh, attribute_name, colors, linear=False, corners=None):
+    """Write (N, 4) array into face corner colors of a color attribute.
+
+    mesh is the one from bulk_mesh(obj). Edit-mode objects get only corners
+    (all by default) written into their bmesh color layer, the rest of the
+    edit mesh is left as is.
+    """
+
+    attribute = mesh.color_attributes.get(attribute_name)
+    buffer = np.ascontiguousarray(colors, dtype=np.float32).reshape(-1)
+    attribute.data.foreach_set('color' if linear else color_property(attribute), buffer)
+
+    if obj.mode != 'EDIT':
+        mesh.update()
+        return
+
+    # Colors as stored, byte colors are already rounded
+    stored = read_corner_colors(mesh, attribute_name)
+    write_loop_colors(obj, attribute, edit_loops(obj, mesh, corners), stored if corners is None else stored[corners])
+
+
+def edit_loops(obj, mesh, corners=None):
+    """BMesh loops of edit-mode obj at corners of mesh from bulk_mesh(obj), all by default."""
+
+    bm = bmesh.from_edit_mesh(obj.data)
+
+    if corners is None:
+        return bmesh_loops(bm)
+
+    corners = np.asarray(corners, dtype=np.int64)
+    faces = loop_face_index(mesh)[corners]
+    sides = corners - read_array(mesh.polygons, 'loop_start', np.int64)[faces]
+
+    bm.faces.ensure_lookup_table()
+    return [bm.faces[face].loops[side] for face, side in zip(faces.tolist(), sides.tolist())]
+
+
+def bmesh_loops(bm):
+    """All loops of bmesh, in face corner order of a mesh written from it."""
+
+    return [loop for face in bm.faces for loop in face.loops]
+
+
+def write_loop_colors(obj, attribute, loops, colors):
+    """Write colors, as seen from bmesh, into a color attribute of edit-mode loops."""
+
+    layer = bmesh_color_layer(bmesh.from_edit_mesh(obj.data), attribute)
+    for loop, color in zip(loops, colors.tolist()):
+        loop[layer] = color
+
+    bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
+
+
+def write_selection(obj, mesh, vert_select, edge_select, face_select=None):
+    """Write selection of vertices, edges and faces (if given) into mesh from bulk_mesh(obj).
+
+    Edit-mode objects get only the changed elements written into their bmesh.
+    """
+
+    targets = [(mesh.vertices, vert_select), (mesh.edges, edge_select)]
+    if face_select is not None:
+        targets.append((mesh.polygons, face_select))
+
+    if obj.mode != 'EDIT':
+        for collection, select in targets:
+            collection.foreach_set('select', select)
+        mesh.update()
+        return
+
+    bm = bmesh.from_edit_mesh(obj.data)
+
+    # Elements of the temporary mesh are in bmesh order
+    for (collection, select), elements in zip(targets, (bm.verts, bm.edges, bm.faces)):
+        changed = np.flatnonzero(read_array(collection, 'select', bool) != select)
+        collection.foreach_set('select', select)
+
+        elements.ensure_lookup_table()
+        for i, value in zip(changed.tolist(), select[changed].tolist()):
+            elements[i].select = value
+
+    bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
+
+
+def read_array(collection, prop, dtype, size=1):
+    buffer = np.empty(len(collection) * size, dtype=dtype)
+    collection.foreach_get(prop, buffer)
+
+    return buffer if size == 1 else buffer.reshape(-1, size)
+
+
+def loop_vertex_index(mesh):
+    return read_array(mesh.loops, 'vertex_index', np.int32)
+
+
+def loop_face_index(mesh):
+    loop_total = read_array(mesh.polygons, 'loop_total', np.int32)
+    return np.repeat(np.arange(len(loop_total), dtype=np.int32), loop_total)
+
+
+def corner_select_weights(mesh, select_mode):
+    """Count of selected elements owning each corner, same as Refresh counting."""
+
+    weights = np.zeros(len(mesh.loops), dtype=np.int64)
+
+    # vert or edge mode
+    if select_mode[0] or select_mode[1]:
+        vert_select = read_array(mesh.vertices, 'select', bool)
+        weights += vert_select[loop_vertex_index(mesh)]
+
+    # faces
+    if select_mode[2]:
+        face_select = read_array(mesh.polygons, 'select', bool)
+        weights += face_select[loop_face_index(mesh)]
+
+    return weights
+
+
+def select_vertices(obj, mesh, vert_select, select_edges=False):
+    """Set vertex selection, selecting edges between selected vertices too, if select_edges.
+
+    Same as setting BMVert.select for every selected vertex, written in bulk.
+    """
+
+    edge_select = read_array(mesh.edges, 'select', bool)
+    if select_edges:
+        edge_select |= vert_select[read_array(mesh.edges, 'vertices', np.int32, 2)].all(axis=1)
+
+    write_selection(obj, mesh, vert_select, edge_select)
+
+
+def select_faces(obj, mesh, face_select):
+    """Set face selection, selecting edges and vertices of selected faces too.
+
+    Same as setting BMFace.select for every selected face, written in bulk.
+    """
+
+    selected_loops = face_select[loop_face_index(mesh)]
+
+    vert_select = read_array(mesh.vertices, 'select', bool)
+    vert_select[loop_vertex_index(mesh)[selected_loops]] = True
+
+    edge_select = read_array(mesh.edges, 'select', bool)
+    edge_select[read_array(mesh.loops, 'edge_index', np.int32)[selected_loops]] = True
+
+    write_selection(obj, mesh, vert_select, edge_select, face_select)
+
+
+def selected_corners(mesh, select_mode):
+    """Indices of corners of selected elements, every corner once.
+
+    Faces are used in face mode, vertices in vertex mode, vertices of selected edges in edge mode.
+    """
+
+    if select_mode[2]:
+        face_select = read_array(mesh.polygons, 'select', bool)
+        return np.flatnonzero(face_select[loop_face_index(mesh)])
+
+    if select_mode[0]:
+        vert_select = read_array(mesh.vertices, 'select', bool)
+
+    elif select_mode[1]:
+        vert_select = np.zeros(len(mesh.vertices), dtype=bool)
+        edge_verts = read_array(mesh.edges, 'vertices', np.int32, 2)
+        vert_select[edge_verts[read_array(mesh.edges, 'select', bool)].reshape(-1)] = True
+
+    else:
+        return np.zeros(0, dtype=np.int64)
+
+    return np.flatnonzero(vert_select[loop_vertex_index(mesh)])
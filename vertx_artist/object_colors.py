@@ -1,101 +1,76 @@
 import colorsys
-import math
+from contextlib import ExitStack
+import hashlib
+import time
 
 import bpy
+from bpy.app.handlers import persistent
 import bmesh
+import numpy as np
+
+from .color_cache import cache_path, read_cache, write_cache
+from .color_index import ColorLookup, ObjectColorIndex, color_keys, quantize_colors
+from .color_math import adjust_hsv_array, inverse_gamma_array, set_restricted_colors
+from .mesh_data import (
+    bmesh_color_layer,
+    bmesh_loops,
+    bulk_mesh,
+    corner_select_weights,
+    edit_loops,
+    fingerprint_tail,
+    loop_vertex_index,
+    mesh_fingerprint,
+    mesh_objects,
+    read_array,
+    read_corner_colors,
+    select_faces,
+    select_vertices,
+    selected_corners,
+    unique_mesh_objects,
+    write_corner_colors,
+    write_loop_colors
+)
 
 
-# Gamma correction and inverse gamma correction may be reversed
-def inverse_gamma(c: float):
-    """Gamma uncorrection."""
-
-    c = min(max(0, c), 1)
-    c = c / 12.92 if c < 0.04045 else math.pow((c + 0.055) / 1.055, 2.4)
-
-    return c
-
-
-def gamma_correct(c: float):
-    """Gamma correction."""
-
-    c = max(0.0, c * 12.92) if c < 0.0031308 else 1.055 * math.pow(c, 1.0 / 2.4) - 0.055
-    c = max(min(int(c * 255 + 0.5), 255), 0)
-
-    return c / 255
-
-
-def inverse_gamma_color(rgb):
-    """Gamma uncorrection."""
-
-    # return r, g, b
-    return inverse_gamma(rgb[0]), inverse_gamma(rgb[1]), inverse_gamma(rgb[2])
-
+ignore_color_change = False
 
-def gamma_correct_color(rgb):
-    """Gamma correction."""
+color_lookup = ColorLookup()
 
-    # return r / 255, g / 255, b / 255
-    return gamma_correct(rgb[0]), gamma_correct(rgb[1]), gamma_correct(rgb[2])
+LIVE_UPDATE_INTERVAL = 1 / 60
 
+# Background Refresh works in chunks of corners, for at most the time budget (seconds) per timer call
+REFRESH_CHUNK_SIZE = 1 << 18
+REFRESH_TIME_BUDGET = 0.02
 
-def set_restricted_color(color: tuple, new_color: tuple, channels: str):
-    """Set color according to restrictions."""
+DEFAULT_HSV_TOLERANCE = 0.0001
 
-    if bpy.context.mode != "EDIT_MESH":
-        new_color = inverse_gamma_color(new_color)
+# Object Colors edits waiting to be written, color id: (color, channels), and mesh name: object name
+pending_colors = {}
+pending_meshes = {}
 
-    if "R" in channels:
-        color[0] = new_color[0]
+refresh_job = None
 
-    if "G" in channels:
-        color[1] = new_color[1]
+# Auto Refresh waits for changes to settle (seconds), then re-indexes only meshes with changed colors
+AUTO_REFRESH_DELAY = 0.25
 
-    if "B" in channels:
-        color[2] = new_color[2]
+# Mesh name: fingerprint of indexed colors, and selected corner count of every color id
+mesh_fingerprints = {}
+selected_counts = {}
 
-    if "A" == channels:
-        hsv_color = colorsys.rgb_to_hsv(*new_color)
-        for i in range(3):
-            color[i] = hsv_color[2]
+dirty_meshes = set()
+auto_refresh_selection = None
 
+# Color ids in the order Object Colors shows them, recolored colors keep their place until the next update
+displayed_colors = []
 
-def round_color(color, precision=5):
-    return tuple(round(x, precision) for x in color)
+# Mesh name: (bmesh, element counts, loops in corner order) of edit-mode meshes, built once per Refresh
+edit_loop_cache = {}
 
+# Color cache of the open .blend is loaded once, on first use
+color_cache_loaded = False
 
-ignore_color_change = False
 
-"""
-{
-    col_idx: [
-        col_rgb, {
-        "obj": {
-            vert_idx: [
-                corner_list_idx,
-                ...
-            ]
-        }
-    }]
-}
-"""
-color_corner_lookup = {}
-lookup_to_obj_col_idx_mapping = {}
-obj_to_lookup_col_idx_mapping = []
-"""
-{
-    ("obj", vert_idx): col_idx
-}
-"""
-corner_color_lookup = {}
-
-
-def get_face_corner_idx(corner):
-    for i in range(len(corner.vert.link_loops)):
-        if corner.vert.link_loops[i].index == corner.index:
-            return i
-
-
-def sort_update_object_colors(colors, active_color_index):
+def sort_update_object_colors(active_color_index):
     global ignore_color_change
 
     if active_color_index is None:
@@ -103,6 +78,8 @@ def sort_update_object_colors(colors, active_color_index):
 
     ignore_color_change = True
 
+    colors = color_lookup.order
+
     to_remove_count = len(bpy.context.scene.vrtxa_object_colors) - len(colors)
     if to_remove_count > len(colors):
         bpy.context.scene.vrtxa_object_colors.clear()
@@ -114,68 +91,41 @@ def sort_update_object_colors(colors, active_color_index):
         new_color = bpy.context.scene.vrtxa_object_colors.add()
         new_color.index = len(bpy.context.scene.vrtxa_object_colors) - 1
 
-    bpy.context.scene.vrtxa_active_color_index = lookup_to_obj_col_idx_mapping[active_color_index]
-    for i, color_comp in enumerate(colors):
-        color = color_comp[0]
-        bpy.context.scene.vrtxa_object_colors[i].color = color
+    displayed_colors[:] = colors
+
+    bpy.context.scene.vrtxa_active_color_index = color_lookup.positions[active_color_index]
+    for i, color_idx in enumerate(colors):
+        bpy.context.scene.vrtxa_object_colors[i].color = color_lookup.colors[color_idx]
 
     ignore_color_change = False
 
 
-def update_lookups(new_color, changes):
-    global color_corner_lookup, corner_color_lookup
+def indexed_as_is(mesh_name, mesh, attribute_name):
+    """Whether the lookup has the colors of mesh as they are, checked before an incremental write.
 
-    if new_color not in [x[0] for x in color_corner_lookup.values()]:
-        new_color_idx = max(color_corner_lookup.keys()) + 1 if len(color_corner_lookup) > 0 else 0
-        color_corner_lookup.setdefault(
-            new_color_idx, [new_color, {}]
-        )
-    else:
-        new_color_idx = [x for x in color_corner_lookup.items() if x[1][0] == new_color][0][0]
-
-    # Add new entry to color corner lookup
-    for change in changes:
-        obj_name = change[0]
-        vert_idx = change[1]
-        corner_list_idx = change[2]
-
-        color_corner_lookup[new_color_idx][1].setdefault(
-            obj_name, {}
-        ).setdefault(
-            vert_idx, []
-        ).append(
-            corner_list_idx
-        )
+    Only then the fingerprint is refreshed after the write, other changes are left to Auto Refresh.
+    """
 
-    removed_col_idxs = []
+    fingerprint = mesh_fingerprints.get(mesh_name)
+    return fingerprint is not None and fingerprint == mesh_fingerprint(mesh, attribute_name)
 
-    # Remove old and empty entries
-    for change in changes:
-        obj_name = change[0]
-        vert_idx = change[1]
-        corner_list_idx = change[2]
 
-        col_idx = corner_color_lookup[(obj_name, corner_list_idx)]
-        color_corner_lookup[col_idx][1][obj_name][vert_idx].remove(corner_list_idx)
+def update_lookups(changes):
+    """Move changed corners to new colors, visiting only the changed corners.
 
-        if len(color_corner_lookup[col_idx][1][obj_name][vert_idx]) == 0:
-            del color_corner_lookup[col_idx][1][obj_name][vert_idx]
-        
-        if len(color_corner_lookup[col_idx][1][obj_name]) == 0:
-            del color_corner_lookup[col_idx][1][obj_name]
+    changes are (mesh_name, corners, new_colors), new_colors is one color, or one per corner.
+    Return the color id most of the changed corners moved to.
+    """
 
-        if len(color_corner_lookup[col_idx][1]) == 0:
-            removed_col_idxs.append(col_idx)
-            del color_corner_lookup[col_idx]
+    new_color_ids = [
+        color_lookup.update_corners(mesh_name, corners, new_colors)
+        for mesh_name, corners, new_colors in changes
+    ]
 
-    # Update corner color lookup
-    for change in changes:
-        obj_name = change[0]
-        corner_list_idx = change[2]
+    if not any(len(x) for x in new_color_ids):
+        return None
 
-        corner_color_lookup[(obj_name, corner_list_idx)] = new_color_idx
-
-    return new_color_idx
+    return int(np.argmax(np.bincount(np.concatenate(new_color_ids))))
 
 
 class VRTXA_OT_SetColor(bpy.types.Operator):
@@ -208,9 +158,6 @@ class VRTXA_OT_SetColor(bpy.types.Operator):
         return in_edit_mode or (in_paint_mode and paint_select)
 
     def execute(self, context):
-        global color_corner_lookup, corner_color_lookup
-        global lookup_to_obj_col_idx_mapping, obj_to_lookup_col_idx_mapping
-
         obj = bpy.context.object
         color_attribute = obj.data.color_attributes.active_color
 
@@ -225,122 +172,61 @@ class VRTXA_OT_SetColor(bpy.types.Operator):
 
         channels = obj.vrtxa_layers[obj.data.color_attributes.active_color_index].channels
 
-        changes = []
-        new_color_idx = None
-        new_color = None
-
         # VERTEX PAINT MODE
         if bpy.context.mode == "PAINT_VERTEX":
             try:
-                vert_mode = obj.data.use_paint_mask_vertex
-                poly_mode = obj.data.use_paint_mask
+                select_mode = (obj.data.use_paint_mask_vertex, False, obj.data.use_paint_mask)
             except AttributeError:
                 return {"FINISHED"}
 
-            if vert_mode:
-                selected_vert_idx = []
-
-                for vertex in obj.data.vertices:
-                    if vertex.select:
-                        selected_vert_idx.append(vertex.index)
-
-                for i, l in enumerate(obj.data.loops):
-                    if l.vertex_index not in selected_vert_idx:
-                        continue
-
-                    set_restricted_color(
-                        color_attribute.data[i].color,
-                        color,
-                        channels
-                    )
-
-                    changes.append((obj.name, l.vertex_index, i))
-
-            # polygons
-            if poly_mode:
-                for polygon in obj.data.polygons:
-                    if polygon.select:
-                        for i in polygon.loop_indices:
-                            set_restricted_color(
-                                color_attribute.data[i].color,
-                                color,
-                                channels
-                            )
-
-                            changes.append((obj.name, obj.data.loops[i].vertex_index, i))
-            
-            new_color = round_color(gamma_correct_color(tuple(color_attribute.data[changes[-1][2]].color)[:-1]))
+            objs = [obj]
+            color = inverse_gamma_array(color)
 
         # EDIT MODE
-        if bpy.context.mode == "EDIT_MESH":
+        elif bpy.context.mode == "EDIT_MESH":
+            select_mode = tuple(bpy.context.tool_settings.mesh_select_mode)
+
             objs = bpy.context.selected_objects
             if not objs:
                 objs = [obj]
 
-            # Ignore non-mesh objects
-            objs = [x for x in objs if x.type == "MESH"]
-
-            for obj in objs:
-                mode = list(bpy.context.tool_settings.mesh_select_mode)
-                bm = bmesh.from_edit_mesh(obj.data)
-                active_layer = bm.loops.layers.color.get(color_attribute.name)
-
-                # edge or vertex selection
-                if mode[0] or mode[1]:
-                    for vert in bm.verts:
-                        if vert.select:
-                            for corner_idx, corner in enumerate(vert.link_loops):
-                                set_restricted_color(
-                                    corner[active_layer],
-                                    color,
-                                    channels
-                                )
-
-                                changes.append((obj.name, vert.index, corner.index))
-
-                # faces
-                if mode[2]:
-                    for face in bm.faces:
-                        if face.select:
-                            for corner in face.loops:
-                                set_restricted_color(
-                                    corner[active_layer],
-                                    color,
-                                    channels
-                                )
-
-                                changes.append((obj.name, corner.vert.index, corner.index))
-
-                if new_color is None:
-                    # new_color = tuple(bm.verts[changes[-1][1]].link_loops[changes[-1][2]][active_layer])[:-1]
-                    if mode[0] or mode[1]:
-                        for vert in bm.verts:
-                            if vert.select:
-                                new_color = round_color(tuple(vert.link_loops[0][active_layer])[:-1])
-                                break
-
-                    if mode[2]:
-                        for face in bm.faces:
-                            if face.select:
-                                new_color = round_color(tuple(face.loops[0][active_layer])[:-1])
-                                break
-
-                bmesh.update_edit_mesh(obj.data)
-
-        new_color_idx = update_lookups(new_color, changes)
-
-        """
-        colors = {
-            (r, g, b): idx
-        }
-        """
-        colors = [(x[1][0], x[0]) for x in color_corner_lookup.items()]
-        colors = sorted(colors, key=lambda x: colorsys.rgb_to_hsv(*x[0]))
-        lookup_to_obj_col_idx_mapping = {x[1]: i for i, x in enumerate(colors)}
-        obj_to_lookup_col_idx_mapping = [x[1] for x in colors]
-        active_color_index = new_color_idx
-
-        sort_update_object_colors(colors, active_color_index)
+            # Ignore non-mesh objects, linked duplicates once
+            objs = unique_mesh_objects(objs)
+
+        else:
+            return {"FINISHED"}
+
+        # Paint mode works with linear colors, edit mode with colors as in bmesh
+        linear = bpy.context.mode == "PAINT_VERTEX"
+        changes = []
+
+        for obj in objs:
+            with bulk_mesh(obj) as mesh:
+                corner_colors = read_corner_colors(mesh, color_attribute.name, linear)
+                if corner_colors is None:
+                    continue
+
+                corners = np.flatnonzero(corner_select_weights(mesh, select_mode))
+                if len(corners) == 0:
+                    continue
+
+                indexed = indexed_as_is(obj.data.name, mesh, color_attribute.name)
+
+                corner_colors[corners] = set_restricted_colors(corner_colors[corners], color, channels)
+                write_corner_colors(obj, mesh, color_attribute.name, corner_colors, linear, corners)
+
+                if indexed:
+                    mesh_fingerprints[obj.data.name] = mesh_fingerprint(mesh, color_attribute.name)
+
+                # Lookup colors are as stored, and as in bmesh
+                corner_colors = read_corner_colors(mesh, color_attribute.name)
+
+                changes.append((obj.data.name, corners, corner_colors[corners, :3]))
+
+        new_color_idx = update_lookups(changes)
+
+        if new_color_idx in color_lookup.positions:
+            sort_update_object_colors(new_color_idx)
 
         return {"FINISHED"}
 
@@ -352,6 +238,28 @@ class VRTXA_OT_ApplyAlphaGradient(bpy.types.Operator):
     bl_options = {"REGISTER", "UNDO"}
     neg_axis: bpy.props.FloatProperty(name='neg_axis', default=0.0, min=0.0, max=1.0)
     pos_axis: bpy.props.FloatProperty(name='pos_axis', default=1.0, min=0.0, max=1.0)
+    gradient_type: bpy.props.EnumProperty(
+        name="Gradient Type",
+        items=[
+            ("AXIS", "Axis", "Gradient along direction"),
+            ("RADIAL", "Radial", "Gradient by distance from 3D cursor")
+        ],
+        default="AXIS"
+    )
+    direction: bpy.props.FloatVectorProperty(
+        name="Direction",
+        description="Direction of axis gradient",
+        subtype="DIRECTION",
+        default=(0.0, 0.0, 1.0)
+    )
+    space: bpy.props.EnumProperty(
+        name="Space",
+        items=[
+            ("WORLD", "World", "One gradient over all objects, in world space"),
+            ("LOCAL", "Local", "Gradient over each object separately, in object space")
+        ],
+        default="WORLD"
+    )
 
     def calculate_alpha(self, min_z, max_z, z):
         """Calculate alpha value for vertex."""
@@ -360,6 +268,27 @@ class VRTXA_OT_ApplyAlphaGradient(bpy.types.Operator):
         alpha = (z - min_z) / div * (self.pos_axis - self.neg_axis) + self.neg_axis
         return alpha
 
+    def gradient_positions(self, obj, coords):
+        """Position along gradient of (N, 3) object space vertex coordinates."""
+
+        center = np.array(bpy.context.scene.cursor.location, dtype=np.float64)
+
+        if self.space == "WORLD":
+            matrix = np.array(obj.matrix_world, dtype=np.float64)
+            coords = coords @ matrix[:3, :3].T + matrix[:3, 3]
+        else:
+            center = np.array(obj.matrix_world.inverted() @ bpy.context.scene.cursor.location, dtype=np.float64)
+
+        if self.gradient_type == "RADIAL":
+            return np.linalg.norm(coords - center, axis=1)
+
+        direction = np.array(self.direction, dtype=np.float64)
+        length = np.linalg.norm(direction)
+        if length == 0:
+            direction, length = np.array((0.0, 0.0, 1.0)), 1.0
+
+        return coords @ (direction / length)
+
     @classmethod
     def poll(cls, context):
         active_obj = bpy.context.object
@@ -382,81 +311,195 @@ class VRTXA_OT_ApplyAlphaGradient(bpy.types.Operator):
 
         bpy.context.view_layer.objects.active = active_obj
 
-        if bpy.context.mode == "OBJECT":
-            obj_verts_coords = [obj.matrix_world @ v.co for obj in objects for v in obj.data.vertices]
-        elif bpy.context.mode == "EDIT_MESH":
-            obj_verts_coords = []
-            for obj in objects:
-                if obj.type != "MESH":
+        # Edit mode colors are as in bmesh, only selected vertices are changed
+        edit_mode = bpy.context.mode == "EDIT_MESH"
+
+        changes = []
+
+        with ExitStack() as meshes:
+            # Every mesh is read and written once, linked duplicates differ only in world space positions
+            targets = []
+            for group in mesh_objects(objects).values():
+                if group[0].data.color_attributes.active_color.domain != 'CORNER':
                     continue
 
-                bm = bmesh.from_edit_mesh(obj.data)
-                obj_verts_coords.extend([obj.matrix_world @ v.co for v in bm.verts if v.select])
+                mesh = meshes.enter_context(bulk_mesh(group[0]))
+                coords = read_array(mesh.vertices, 'co', np.float32, 3).astype(np.float64)
 
-        if len(obj_verts_coords) == 0:
-            return {"FINISHED"}
+                if edit_mode:
+                    vert_select = read_array(mesh.vertices, 'select', bool)
+                else:
+                    vert_select = np.ones(len(mesh.vertices), dtype=bool)
 
-        min_z = min(obj_verts_coords, key=lambda x: x[2])[2]
-        max_z = max(obj_verts_coords, key=lambda x: x[2])[2]
+                if self.space == "LOCAL":
+                    group = group[:1]
 
-        if bpy.context.mode == "EDIT_MESH":
-            rolling_i = 0
-            for i, obj in enumerate(objects):
-                if obj.type != "MESH":
-                    continue
+                group_positions = [self.gradient_positions(obj, coords[vert_select]) for obj in group]
+                if len(group_positions[0]):
+                    targets.append((group, mesh, vert_select, group_positions))
+
+            if not targets:
+                return {"FINISHED"}
+
+            min_z = min(positions.min() for _, _, _, group_positions in targets for positions in group_positions)
+            max_z = max(positions.max() for _, _, _, group_positions in targets for positions in group_positions)
+
+            for group, mesh, vert_select, group_positions in targets:
+                # The last duplicate is written, as its gradient would overwrite the others
+                obj, positions = group[-1], group_positions[-1]
+
+                if self.space == "LOCAL":
+                    min_z, max_z = positions.min(), positions.max()
+
+                vert_alpha = np.zeros(len(vert_select), dtype=np.float64)
+                vert_alpha[vert_select] = self.calculate_alpha(min_z, max_z, positions)
+
+                loop_verts = loop_vertex_index(mesh)
+                corners = np.flatnonzero(vert_select[loop_verts])
+                corner_alpha = vert_alpha[loop_verts[corners]]
 
-                bm = bmesh.from_edit_mesh(obj.data)
                 active_name = obj.data.color_attributes.active_color.name
                 channels = obj.vrtxa_layers[active_name].channels
-                color_attribute = bm.loops.layers.color.get(active_name)
 
-                for vert in bm.verts:
-                    if not vert.select:
-                        continue
+                indexed = indexed_as_is(obj.data.name, mesh, active_name)
 
-                    alpha = self.calculate_alpha(min_z, max_z, obj_verts_coords[rolling_i][2])
-                    rolling_i += 1
+                corner_colors = read_corner_colors(mesh, active_name, linear=not edit_mode)
+                if channels == 'A':
+                    corner_colors[corners, :3] = corner_alpha[:, None]
+                else:
+                    corner_colors[corners, 3] = corner_alpha
 
-                    for corner in vert.link_loops:
-                        if channels == 'A':
-                            corner[color_attribute][0] = alpha
-                            corner[color_attribute][1] = alpha
-                            corner[color_attribute][2] = alpha
-                        else:
-                            corner[color_attribute][3] = alpha
+                write_corner_colors(obj, mesh, active_name, corner_colors, linear=not edit_mode, corners=corners)
 
-                bmesh.update_edit_mesh(obj.data)
+                if indexed:
+                    mesh_fingerprints[obj.data.name] = mesh_fingerprint(mesh, active_name)
 
-        # Object mode
-        else:
-            rolling_i = 0
-            for obj in objects:
-                if obj.type != "MESH":
-                    continue
+                # Alpha is not part of the lookup, alpha layers show it in RGB
+                if channels == 'A':
+                    corner_colors = read_corner_colors(mesh, active_name)
+                    changes.append((obj.data.name, corners, corner_colors[corners, :3]))
 
-                channels = obj.vrtxa_layers[obj.data.color_attributes.active_color.name].channels
+        if not changes:
+            return {"FINISHED"}
 
-                vert_corners = [[] for _ in range(len(obj.data.vertices))]
-                for corner in obj.data.loops:
-                    vert_corners[corner.vertex_index].append(corner.index)
+        # Objects missing from the lookup need a full refresh
+        if any(mesh_name not in color_lookup.meshes for mesh_name, _, _ in changes):
+            bpy.ops.vertx_artist.refresh('INVOKE_DEFAULT')
+            return {"FINISHED"}
 
-                for i in range(len(obj.data.vertices)):
-                    alpha = self.calculate_alpha(min_z, max_z, obj_verts_coords[rolling_i + i][2])
+        new_color_idx = update_lookups(changes)
+        if new_color_idx in color_lookup.positions:
+            sort_update_object_colors(new_color_idx)
 
-                    for corner in vert_corners[i]:
-                        if channels == 'A':
-                            obj.data.color_attributes.active_color.data[corner].color[0] = alpha
-                            obj.data.color_attributes.active_color.data[corner].color[1] = alpha
-                            obj.data.color_attributes.active_color.data[corner].color[2] = alpha
-                        else:
-                            obj.data.color_attributes.active_color.data[corner].color[3] = alpha
+        return {"FINISHED"}
 
-                rolling_i += len(obj.data.vertices)
 
-        # POSSIBLE OPTIMIZATION WITH LOOKUPS
-        bpy.ops.vertx_artist.refresh('INVOKE_DEFAULT')
+def displayed_position(color_id):
+    """Position of color id in Object Colors, None if not shown."""
 
-        return {"FINISHED"}
+    if color_id not in displayed_colors:
+        return None
+
+    return displayed_colors.index(color_id)
+
+
+def cached_edit_loops(obj):
+    """BMesh loops of edit-mode obj in corner order, kept until its topology changes."""
+
+    bm = bmesh.from_edit_mesh(obj.data)
+    counts = (len(bm.verts), len(bm.edges), len(bm.faces))
+
+    cached = edit_loop_cache.get(obj.data.name)
+    if cached is None or cached[0] is not bm or cached[1] != counts:
+        cached = (bm, counts, bmesh_loops(bm))
+        edit_loop_cache[obj.data.name] = cached
+
+    return cached[2]
+
+
+def apply_pending_colors():
+    """Write colors changed in Object Colors since the last call, one write per mesh.
+
+    Edit-mode meshes get only the changed corners written, through their cached bmesh loops.
+    Changed colors take the color stored for their first written corner.
+    """
+
+    changes = dict(pending_colors)
+    obj_names = dict(pending_meshes)
+    pending_colors.clear()
+    pending_meshes.clear()
+
+    stored_colors = {}
+
+    for mesh_name in color_lookup.meshes:
+        obj = bpy.data.objects.get(obj_names.get(mesh_name, ''))
+        if obj is None:
+            continue
+
+        color_attribute = obj.data.color_attributes.active_color
+        if color_attribute is None:
+            continue
+
+        corner_groups = [(color_idx, color_lookup.corners(mesh_name, color_idx), change) for color_idx, change in changes.items()]
+        corner_groups = [x for x in corner_groups if len(x[1])]
+        if not corner_groups:
+            continue
+
+        if obj.mode == 'EDIT':
+            loops = cached_edit_loops(obj)
+            if len(loops) != len(color_lookup.meshes[mesh_name].color_ids):
+                continue
+
+            layer = bmesh_color_layer(bmesh.from_edit_mesh(obj.data), color_attribute)
+            if layer is None:
+                continue
+
+            changed_loops = []
+            new_colors = []
+            for _, corners, (new_color, channels) in corner_groups:
+                group = [loops[i] for i in corners.tolist()]
+                colors = np.array([loop[layer] for loop in group], dtype=np.float32).reshape(-1, 4)
+
+                changed_loops += group
+                new_colors.append(set_restricted_colors(colors, new_color, channels))
+
+            write_loop_colors(obj, color_attribute, changed_loops, np.concatenate(new_colors))
+
+            # Not fingerprinted without a mesh copy, Auto Refresh finds nothing to re-index once edits settle
+            for color_idx, corners, _ in corner_groups:
+                stored_colors.setdefault(color_idx, tuple(loops[corners[0]][layer])[:3])
+
+            continue
+
+        with bulk_mesh(obj) as mesh:
+            corner_colors = read_corner_colors(mesh, color_attribute.name)
+            if corner_colors is None:
+                continue
+
+            indexed = indexed_as_is(mesh_name, mesh, color_attribute.name)
+
+            for _, corners, (new_color, channels) in corner_groups:
+                corner_colors[corners] = set_restricted_colors(corner_colors[corners], new_color, channels)
+
+            changed = np.concatenate([corners for _, corners, _ in corner_groups])
+            write_corner_colors(obj, mesh, color_attribute.name, corner_colors, corners=changed)
+
+            if indexed:
+                mesh_fingerprints[mesh_name] = mesh_fingerprint(mesh, color_attribute.name)
+
+            corner_colors = read_corner_colors(mesh, color_attribute.name)
+            for color_idx, corners, _ in corner_groups:
+                stored_colors.setdefault(color_idx, tuple(corner_colors[corners[0], :3]))
+
+    for color_idx, (new_color, channels) in changes.items():
+        if color_idx in stored_colors:
+            color = stored_colors[color_idx]
+        else:
+            color = set_restricted_colors([(*color_lookup.colors[color_idx], 1.0)], new_color, channels)[0, :3]
+
+        color_lookup.recolor(color_idx, [float(x) for x in color])
+
+    return None
 
 
 class VRTXA_GROUP_ObjectColor(bpy.types.PropertyGroup):
@@ -465,9 +508,6 @@ class VRTXA_GROUP_ObjectColor(bpy.types.PropertyGroup):
         """Update color of everything with same color."""
 
         if not ignore_color_change:
-            color_idx = obj_to_lookup_col_idx_mapping[self.index]
-            new_color = self.color
-
             obj = bpy.context.object
             objs = bpy.context.selected_objects
             if not objs:
@@ -475,30 +515,20 @@ class VRTXA_GROUP_ObjectColor(bpy.types.PropertyGroup):
                     return
                 objs = [obj]
 
-            # Ignore non-mesh objects
-            objs = [x for x in objs if x.type == "MESH"]
-            obj_name_map = {x.name: x for x in objs}
-
-            for obj_name in color_corner_lookup[color_idx][1]:
-                obj = obj_name_map[obj_name]        
-                color_attribute = obj.data.color_attributes.active_color
-                if color_attribute is None:
-                    continue
+            # Ignore non-mesh objects, linked duplicates once
+            objs = unique_mesh_objects(objs)
 
-                bm = bmesh.from_edit_mesh(obj.data)
-                active_layer = bm.loops.layers.color.get(color_attribute.name)
+            if self.index >= len(displayed_colors):
+                return
 
-                for vert_idx in color_corner_lookup[color_idx][1][obj.name]:
-                    for corner_list_idx in color_corner_lookup[color_idx][1][obj.name][vert_idx]:
-                        bm_loop = [loop for loop in bm.verts[vert_idx].link_loops if loop.index == corner_list_idx][0]
-                        set_restricted_color(
-                            bm_loop[active_layer],
-                            new_color,
-                            bpy.context.view_layer.objects.active.vrtxa_layers[bpy.context.object.data.color_attributes.active_color_index].channels
-                        )
-                        color_corner_lookup[color_idx][0] = bm_loop[active_layer][:-1]
+            # Coalesce updates, colors are written at most once per frame
+            color_idx = displayed_colors[self.index]
+            channels = bpy.context.view_layer.objects.active.vrtxa_layers[bpy.context.object.data.color_attributes.active_color_index].channels
+            pending_colors[color_idx] = (tuple(self.color), channels)
+            pending_meshes.update((x.data.name, x.name) for x in objs)
 
-                bmesh.update_edit_mesh(obj.data)
+            if not bpy.app.timers.is_registered(apply_pending_colors):
+                bpy.app.timers.register(apply_pending_colors, first_interval=LIVE_UPDATE_INTERVAL)
 
     color: bpy.props.FloatVectorProperty(
         name='color', description='Object color to dynamically change',
@@ -540,81 +570,588 @@ class VRTXA_OT_Checkpoint(bpy.types.Operator):
         return {"FINISHED"}
 
 
+def redraw_areas():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            area.tag_redraw()
+
+
+def scene_selection():
+    """Mode and selected objects, a background Refresh is cancelled when they change."""
+
+    return bpy.context.mode, frozenset(x.name for x in bpy.context.view_layer.objects.selected)
+
+
+class RefreshJob:
+    """Refresh split into chunks of corners, run by a timer.
+
+    Colors of every chunk are counted in the color lookup right away, so Object Colors fill in while
+    scanning, also within a mesh. The corner index of a mesh is added once all its chunks are done.
+    """
+
+    def __init__(self, objs, select_mode):
+        self.obj_names = [x.name for x in unique_mesh_objects(objs)]
+        self.select_mode = select_mode
+        self.selection = scene_selection()
+
+        self.done = 0
+        self.corner_colors = None
+        self.weight_counts = np.zeros(0)
+
+    def finished(self):
+        return self.done >= len(self.obj_names)
+
+    def progress(self):
+        if not self.obj_names:
+            return 1.0
+
+        fraction = 0.0
+        if self.corner_colors is not None:
+            fraction = self.offset / max(len(self.corner_colors), 1)
+
+        return (self.done + fraction) / len(self.obj_names)
+
+    def read_next(self):
+        """Read corners of the next object with colors, False if there are none left."""
+
+        while not self.finished():
+            obj = bpy.data.objects.get(self.obj_names[self.done])
+            color_attribute = obj.data.color_attributes.active_color if obj is not None else None
+
+            if color_attribute is not None:
+                with bulk_mesh(obj) as mesh:
+                    corner_colors = read_corner_colors(mesh, color_attribute.name)
+                    if corner_colors is not None:
+                        self.mesh_name = obj.data.name
+                        self.digest = hashlib.blake2b(digest_size=16)
+                        self.fingerprint_tail = fingerprint_tail(mesh, color_attribute.name)
+                        self.corner_colors = corner_colors
+                        self.weights = corner_select_weights(mesh, self.select_mode)
+                        self.corner_verts = loop_vertex_index(mesh)
+                        self.color_ids = np.zeros(len(corner_colors), dtype=np.uint32)
+                        self.offset = 0
+                        return True
+
+            self.done += 1
+
+        return False
+
+    def step(self):
+        """Hash, quantize and count the next chunk of corners, add the mesh to the lookup once all are done."""
+
+        if self.corner_colors is None and not self.read_next():
+            return
+
+        chunk = slice(self.offset, self.offset + REFRESH_CHUNK_SIZE)
+        self.digest.update(self.corner_colors[chunk])
+
+        color_ids = color_lookup.add_keys(color_keys(self.corner_colors[chunk, :3]))
+        self.color_ids[chunk] = color_ids
+        color_lookup.count_corners(color_ids)
+
+        weight_counts = np.bincount(color_ids, weights=self.weights[chunk], minlength=len(color_lookup.colors))
+        weight_counts[:len(self.weight_counts)] += self.weight_counts
+        self.weight_counts = weight_counts
+
+        self.offset += REFRESH_CHUNK_SIZE
+        if self.offset < len(self.corner_colors):
+            return
+
+        color_lookup.add_mesh(self.mesh_name, ObjectColorIndex(self.color_ids, len(color_lookup.colors), self.corner_verts), counted=True)
+
+        self.digest.update(self.fingerprint_tail)
+        mesh_fingerprints[self.mesh_name] = self.digest.hexdigest()
+        selected_counts[self.mesh_name] = np.bincount(self.color_ids, weights=self.weights, minlength=len(color_lookup.colors))
+
+        self.corner_colors = None
+        self.done += 1
+
+    def discard_partial(self):
+        """Remove counted corners of a mesh not finished yet."""
+
+        if self.corner_colors is not None:
+            color_lookup.count_corners(self.color_ids[:self.offset], -1)
+            self.corner_colors = None
+
+    def active_color(self):
+        """Displayed color with the most selected corners so far."""
+
+        if not color_lookup.order:
+            return None
+
+        weight_counts = np.zeros(len(color_lookup.colors))
+        weight_counts[:len(self.weight_counts)] = self.weight_counts
+
+        return color_lookup.order[int(np.argmax(weight_counts[color_lookup.order]))]
+
+
+def run_refresh_job():
+    """Scan corners of a background Refresh for a time budget, show the colors found so far."""
+
+    job = refresh_job
+    if job is None:
+        return None
+
+    if scene_selection() != job.selection:
+        cancel_refresh_job()
+        return None
+
+    start = time.perf_counter()
+
+    while not job.finished() and time.perf_counter() - start < REFRESH_TIME_BUDGET:
+        job.step()
+
+    sort_update_object_colors(job.active_color())
+
+    redraw_areas()
+
+    if job.finished():
+        cancel_refresh_job()
+
+        if dirty_meshes and not bpy.app.timers.is_registered(run_auto_refresh):
+            bpy.app.timers.register(run_auto_refresh, first_interval=AUTO_REFRESH_DELAY)
+
+        return None
+
+    return LIVE_UPDATE_INTERVAL
+
+
+def cancel_refresh_job():
+    """Stop a background Refresh, meshes scanned so far stay in the lookup."""
+
+    global refresh_job
+
+    if refresh_job is None:
+        return
+
+    refresh_job.discard_partial()
+    refresh_job = None
+    if bpy.app.timers.is_registered(run_refresh_job):
+        bpy.app.timers.unregister(run_refresh_job)
+
+    redraw_areas()
+
+
+def refreshed_objects():
+    """Objects Refresh scans, selected objects or the active one."""
+
+    # Also called from timers, where context has no selected_objects
+    objs = list(bpy.context.view_layer.objects.selected)
+    if not objs and bpy.context.view_layer.objects.active is not None:
+        objs = [bpy.context.view_layer.objects.active]
+
+    return objs
+
+
+def reindex_mesh(obj, select_mode):
+    """Update corner index of mesh of obj, if its colors changed since last indexed.
+
+    Colors of an indexed mesh with the same corners are updated incrementally. Return False
+    if the mesh is not indexed, or its corners changed, it then needs a background Refresh.
+    """
+
+    mesh_name = obj.data.name
+    color_attribute = obj.data.color_attributes.active_color
+
+    with bulk_mesh(obj) as mesh:
+        fingerprint = mesh_fingerprint(mesh, color_attribute.name) if color_attribute is not None else None
+
+        if fingerprint is None:
+            forget_mesh(mesh_name)
+            return True
+
+        index = color_lookup.meshes.get(mesh_name)
+        if index is None or not np.array_equal(index.loop_vertex_index, loop_vertex_index(mesh)):
+            forget_mesh(mesh_name)
+            return False
+
+        if fingerprint != mesh_fingerprints.get(mesh_name):
+            corner_colors = read_corner_colors(mesh, color_attribute.name)[:, :3]
+            color_ids = color_lookup.add_keys(color_keys(corner_colors))
+
+            changed = np.flatnonzero(index.color_ids != color_ids)
+            update_lookups([(mesh_name, changed, corner_colors[changed])])
+
+            mesh_fingerprints[mesh_name] = fingerprint
+
+        selected_counts[mesh_name] = np.bincount(
+            color_lookup.meshes[mesh_name].color_ids,
+            weights=corner_select_weights(mesh, select_mode),
+            minlength=len(color_lookup.colors)
+        )
+
+    return True
+
+
+def forget_mesh(mesh_name):
+    color_lookup.remove_mesh(mesh_name)
+    mesh_fingerprints.pop(mesh_name, None)
+    selected_counts.pop(mesh_name, None)
+    edit_loop_cache.pop(mesh_name, None)
+
+
+def start_refresh_job(objs, select_mode):
+    """Refresh objs in the background, adding them to the current color lookup."""
+
+    global refresh_job
+
+    refresh_job = RefreshJob(objs, select_mode)
+    bpy.app.timers.register(run_refresh_job)
+
+
+def live_edit_running():
+    """Whether Object Colors edits are waiting to be written."""
+
+    return bool(pending_colors) or bpy.app.timers.is_registered(apply_pending_colors)
+
+
+def run_auto_refresh():
+    """Re-index changed meshes of refreshed objects, drop meshes no longer refreshed.
+
+    Meshes not indexed yet, or with changed corners, are scanned by a background Refresh.
+    """
+
+    if refresh_job is not None:
+        return None
+
+    # Checked once Object Colors edits are written
+    if live_edit_running():
+        return AUTO_REFRESH_DELAY
+
+    load_color_cache()
+
+    previous_color = active_color_id()
+    previous_order = list(color_lookup.order)
+
+    select_mode = tuple(bpy.context.tool_settings.mesh_select_mode)
+    groups = mesh_objects(refreshed_objects())
+
+    for mesh_name in set(color_lookup.meshes) - set(groups):
+        forget_mesh(mesh_name)
+
+    scan = []
+    for mesh_name, group in groups.items():
+        if mesh_name not in color_lookup.meshes:
+            scan.append(group[0])
+        elif mesh_name in dirty_meshes and not reindex_mesh(group[0], select_mode):
+            scan.append(group[0])
+
+    dirty_meshes.clear()
+
+    if scan:
+        start_refresh_job(scan, select_mode)
+
+    if not color_lookup.order:
+        if not scan:
+            bpy.context.scene.vrtxa_object_colors.clear()
+            displayed_colors.clear()
+        redraw_areas()
+        return None
+
+    # Color with the most selected corners, same as Refresh
+    weight_counts = np.zeros(len(color_lookup.colors))
+    for counts in selected_counts.values():
+        weight_counts[:len(counts)] += counts
+
+    order = color_lookup.order
+    if weight_counts[order].any():
+        active_color = order[int(np.argmax(weight_counts[order]))]
+    elif previous_color in color_lookup.positions:
+        active_color = previous_color
+    else:
+        active_color = order[0]
+
+    # Object Colors rows stay in place when nothing changed, a color edited from them keeps its row
+    if active_color == previous_color and order == previous_order:
+        return None
+
+    sort_update_object_colors(active_color)
+    redraw_areas()
+
+    return None
+
+
+@persistent
+def auto_refresh(scene, depsgraph):
+    """Schedule Auto Refresh when meshes of refreshed objects, or the selection change."""
+
+    global auto_refresh_selection
+
+    from . import eyedropper
+
+    if not bpy.context.preferences.addons['vertx_artist'].preferences.auto_refresh:
+        return
+
+    # Hidden Object Colors are checked in full once shown again
+    if not scene.vrtxa_show_object_colors:
+        auto_refresh_selection = None
+        dirty_meshes.update(color_lookup.meshes)
+        return
+
+    # Modal operators and Object Colors edits keep the lookup up to date themselves
+    if hsv_preview_running or eyedropper.eyedropper_running or live_edit_running():
+        return
+
+    mesh_names = set(mesh_objects(refreshed_objects()))
+    updated = {
+        update.id.original.name
+        for update in depsgraph.updates
+        if isinstance(update.id.original, bpy.types.Mesh)
+    } & mesh_names
+
+    selection = scene_selection()
+    if not updated and selection == auto_refresh_selection:
+        return
+
+    auto_refresh_selection = selection
+    dirty_meshes.update(updated)
+
+    # Changes during a background Refresh are checked once it finishes
+    if refresh_job is not None:
+        return
+
+    if bpy.app.timers.is_registered(run_auto_refresh):
+        bpy.app.timers.unregister(run_auto_refresh)
+    bpy.app.timers.register(run_auto_refresh, first_interval=AUTO_REFRESH_DELAY)
+
+
+def active_color_id():
+    """Color id of the active object color, None if there is none."""
+
+    if 0 <= bpy.context.scene.vrtxa_active_color_index < len(displayed_colors):
+        return displayed_colors[bpy.context.scene.vrtxa_active_color_index]
+
+    return None
+
+
+def load_color_cache():
+    """Restore color lookup from the cache of the open .blend, once.
+
+    Only meshes whose colors and topology match their fingerprint are restored.
+    """
+
+    global color_lookup, color_cache_loaded
+
+    if color_cache_loaded:
+        return None
+
+    # Not marked loaded while disabled, enabling it later still loads the cache
+    if not bpy.context.preferences.addons['vertx_artist'].preferences.color_cache:
+        return None
+    color_cache_loaded = True
+
+    if color_lookup.meshes or refresh_job is not None:
+        return None
+
+    path = cache_path()
+    cache = read_cache(path) if path is not None else None
+    if cache is None:
+        return None
+
+    palette, active_color, cached = cache
+
+    meshes = {}
+    for obj in unique_mesh_objects(bpy.data.objects):
+        mesh_name = obj.data.name
+        color_attribute = obj.data.color_attributes.active_color
+        if mesh_name not in cached or color_attribute is None:
+            continue
+
+        fingerprint, color_ids = cached[mesh_name]
+        with bulk_mesh(obj) as mesh:
+            if mesh_fingerprint(mesh, color_attribute.name) != fingerprint:
+                continue
+
+            meshes[mesh_name] = ObjectColorIndex(color_ids, len(palette), loop_vertex_index(mesh))
+
+        mesh_fingerprints[mesh_name] = fingerprint
+
+    if not meshes:
+        return None
+
+    color_lookup = ColorLookup(palette.tolist(), meshes)
+    if not color_lookup.order:
+        return None
+
+    sort_update_object_colors(active_color if active_color in color_lookup.positions else color_lookup.order[0])
+    redraw_areas()
+
+    return None
+
+
+def request_color_cache():
+    """Load the color cache from a timer, panels can not change scene data while drawing."""
+
+    if not color_cache_loaded and not bpy.app.timers.is_registered(load_color_cache):
+        bpy.app.timers.register(load_color_cache)
+
+
+@persistent
+def save_color_cache(dummy):
+    """Write the color lookup next to the saved .blend, meshes changed since indexing are left out."""
+
+    if not bpy.context.preferences.addons['vertx_artist'].preferences.color_cache:
+        return
+
+    path = cache_path()
+    if path is None or refresh_job is not None or not color_lookup.meshes:
+        return
+
+    fingerprints = {}
+    for obj in unique_mesh_objects(bpy.data.objects):
+        mesh_name = obj.data.name
+        color_attribute = obj.data.color_attributes.active_color
+        if mesh_name not in color_lookup.meshes or mesh_name not in mesh_fingerprints or color_attribute is None:
+            continue
+
+        with bulk_mesh(obj) as mesh:
+            if mesh_fingerprint(mesh, color_attribute.name) == mesh_fingerprints[mesh_name]:
+                fingerprints[mesh_name] = mesh_fingerprints[mesh_name]
+
+    try:
+        write_cache(path, color_lookup, fingerprints, active_color_id())
+    except OSError as e:
+        print(f'VertX Artist: color cache not saved, {e}')
+
+
+@persistent
+def reset_color_lookup(dummy):
+    """Start every opened .blend with an empty color lookup, its cache not loaded yet."""
+
+    global color_lookup, color_cache_loaded, auto_refresh_selection
+
+    cancel_refresh_job()
+
+    color_lookup = ColorLookup()
+    mesh_fingerprints.clear()
+    selected_counts.clear()
+    dirty_meshes.clear()
+    displayed_colors.clear()
+    edit_loop_cache.clear()
+
+    auto_refresh_selection = None
+    color_cache_loaded = False
+
+
+class VRTXA_OT_CancelRefresh(bpy.types.Operator):
+    bl_idname = "vertx_artist.cancel_refresh"
+    bl_label = "Cancel Refresh"
+    bl_description = "Stop refreshing object colors in background"
+
+    def execute(self, context):
+        cancel_refresh_job()
+        return {"FINISHED"}
+
+
 class VRTXA_OT_Refresh(bpy.types.Operator):
     bl_idname = "vertx_artist.refresh"
     bl_label = "Refresh"
     bl_description = "Force refresh object colors"
     bl_options = {"REGISTER", "UNDO"}
 
+    background: bpy.props.BoolProperty(
+        name='background',
+        description='Refresh in chunks, keeping the interface responsive',
+        default=False,
+        options={'SKIP_SAVE'}
+    )
+
     def execute(self, context):
-        global color_corner_lookup, corner_color_lookup
-        global ignore_color_change
-        global lookup_to_obj_col_idx_mapping, obj_to_lookup_col_idx_mapping
+        global color_lookup, color_cache_loaded
 
-        color_corner_lookup = {}
-        corner_color_lookup = {}
+        cancel_refresh_job()
+        color_lookup = ColorLookup()
+        color_cache_loaded = True
+        mesh_fingerprints.clear()
+        selected_counts.clear()
+        edit_loop_cache.clear()
 
-        obj = bpy.context.object
-        objs = bpy.context.selected_objects
+        objs = refreshed_objects()
         if not objs:
-            if obj is None:
-                return {"FINISHED"}
-            objs = [obj]
+            return {"FINISHED"}
+
+        select_mode = tuple(bpy.context.tool_settings.mesh_select_mode)
 
-        """
-        colors = {
-            (r, g, b): [idx, count]
-        }
-        """
-        colors = {}
+        if self.background:
+            bpy.context.scene.vrtxa_object_colors.clear()
+            displayed_colors.clear()
+            start_refresh_job(objs, select_mode)
+            return {"FINISHED"}
+
+        # Read all corners of all objects in bulk
+        scanned = []
 
-        # Ignore non-mesh objects
-        objs = [x for x in objs if x.type == "MESH"]
+        # Ignore non-mesh objects, linked duplicates once
+        objs = unique_mesh_objects(objs)
         for obj in objs:
             color_attribute = obj.data.color_attributes.active_color
             if color_attribute is None:
                 continue
 
-            bm = bmesh.from_edit_mesh(obj.data)
-            active_layer = bm.loops.layers.color.get(color_attribute.name)
-
-            def get_color(c):
-                color = round_color(tuple(corner[active_layer])[:-1])
-                colors.setdefault(color, [len(colors), 0])[1] += c
-
-                color_corner_lookup.setdefault(
-                    colors[color][0], [color, {}]
-                )[1].setdefault(
-                    obj.name, {}
-                ).setdefault(
-                    vert.index, []
-                ).append(
-                    corner.index
-                )
-                corner_color_lookup[(obj.name, corner.index)] = colors[color][0]
-
-            # vert or edge mode
-            if bpy.context.tool_settings.mesh_select_mode[0] or bpy.context.tool_settings.mesh_select_mode[1]:
-                for vert in bm.verts:
-                    for corner_idx, corner in enumerate(vert.link_loops):
-                        get_color(int(vert.select))
-            # faces
-            if bpy.context.tool_settings.mesh_select_mode[2]:
-                for face in bm.faces:
-                    for corner in face.loops:
-                        vert = corner.vert
-                        get_color(int(face.select))
-
-        colors = sorted(colors.items(), key=lambda x: colorsys.rgb_to_hsv(*x[0]))
-        lookup_to_obj_col_idx_mapping = {x[1][0]: i for i, x in enumerate(colors)}
-        obj_to_lookup_col_idx_mapping = [x[1][0] for x in colors]
-        active_color_index = max(range(len(colors)), key=lambda x: colors[x][1][1]) if len(colors) > 0 else None
-
-        sort_update_object_colors(colors, obj_to_lookup_col_idx_mapping[active_color_index])
+            with bulk_mesh(obj) as mesh:
+                corner_colors = read_corner_colors(mesh, color_attribute.name)
+                if corner_colors is None:
+                    continue
+
+                mesh_fingerprints[obj.data.name] = mesh_fingerprint(mesh, color_attribute.name)
+                scanned.append((obj, corner_colors[:, :3], corner_select_weights(mesh, select_mode), loop_vertex_index(mesh)))
+
+        palette, color_ids = quantize_colors(np.concatenate([x[1] for x in scanned]) if scanned else np.zeros((0, 3)))
+        if len(palette) == 0:
+            return {"FINISHED"}
+
+        counts = np.bincount(color_ids, weights=np.concatenate([x[2] for x in scanned]), minlength=len(palette))
+
+        meshes = {}
+        start = 0
+        for obj, corner_colors, _, corner_verts in scanned:
+            meshes[obj.data.name] = ObjectColorIndex(
+                color_ids[start:start + len(corner_colors)],
+                len(palette),
+                corner_verts
+            )
+            start += len(corner_colors)
+
+        color_lookup = ColorLookup(palette.tolist(), meshes)
+        active_color_index = color_lookup.order[int(np.argmax(counts[color_lookup.order]))]
+
+        sort_update_object_colors(active_color_index)
 
         return {"FINISHED"}
 
 
+def matching_colors(color, hsv_tolerance, ignore_hsv):
+    """Mask of color ids within HSV tolerance of color."""
+
+    matching = np.zeros(len(color_lookup.colors), dtype=bool)
+    matching[color_lookup.hsv_index().query(colorsys.rgb_to_hsv(*color), hsv_tolerance, ignore_hsv)] = True
+
+    return matching
+
+
+def match_vertices(index, vert_count, color_id, matching, selection_tolerance, exact):
+    """Vertices with enough corners of color id if exact, or any corner of a matching color."""
+
+    selected_verts = np.zeros(vert_count, dtype=bool)
+
+    if exact:
+        vert_corner_count = np.bincount(index.loop_vertex_index, minlength=vert_count)
+        vert_match_count = np.bincount(index.loop_vertex_index[index.corners(color_id)], minlength=vert_count)
+        selected_verts |= (vert_match_count > 0) & (vert_match_count / np.maximum(vert_corner_count, 1) >= (1 - selection_tolerance))
+
+    if matching is not None:
+        selected_verts[index.loop_vertex_index[matching[index.color_ids]]] = True
+
+    return selected_verts
+
+
+def match_faces(index, loop_starts, loop_totals, matching, selection_tolerance):
+    """Faces with enough corners of a matching color."""
+
+    face_matches = np.add.reduceat(matching[index.color_ids].astype(np.int32), loop_starts)
+    return face_matches / loop_totals >= (1 - selection_tolerance)
+
+
 class VRTXA_OT_SelectByColor(bpy.types.Operator):
     bl_idname = "vertx_artist.select_by_color"
     bl_label = "Select By Color"
@@ -643,7 +1180,7 @@ class VRTXA_OT_SelectByColor(bpy.types.Operator):
     hsv_tolerance: bpy.props.FloatProperty(
         name='hsv_tolerance',
         description='Distance tolerance for HSV comparison (0 means exact match)',
-        default=0.0001, precision=2, step=1,
+        default=DEFAULT_HSV_TOLERANCE, precision=2, step=1,
         min=0.0, max=1.0
     )
 
@@ -657,139 +1194,60 @@ class VRTXA_OT_SelectByColor(bpy.types.Operator):
                 return
             objs = [obj]
 
-        # Ignore non-mesh objects
-        objs = [x for x in objs if x.type == "MESH"]
-        obj_name_map = {x.name: x for x in objs}
+        # Ignore non-mesh objects, linked duplicates once
+        mesh_obj_map = {x.data.name: x for x in unique_mesh_objects(objs)}
 
         if self.select_color_idx == -1:
             # find index from self.select_color
-            for i, color in enumerate(bpy.context.scene.vrtxa_object_colors):
-                if color.color == self.select_color:
-                    self.select_color_idx = i
-                    break
+            position = displayed_position(color_lookup.color_id(self.select_color))
+            if position is not None:
+                self.select_color_idx = position
 
         if self.select_color_idx == -1:
             return {"FINISHED"}
 
-        select_color_idx = obj_to_lookup_col_idx_mapping[self.select_color_idx]
+        if self.select_color_idx >= len(displayed_colors):
+            return {"FINISHED"}
+
+        select_color_idx = displayed_colors[self.select_color_idx]
 
         # Deselect all (only if not in additive mode)
         if bpy.context.mode == "EDIT_MESH" and not self.additive:
-            for obj in objs:
-                bm = bmesh.from_edit_mesh(obj.data)
-                for vert in bm.verts:
-                    vert.select = False
-                for face in bm.faces:
-                    face.select = False
-                for edge in bm.edges:
-                    edge.select = False
-
-                bm.select_flush_mode()
-                bmesh.update_edit_mesh(obj.data)
-
-        def is_color_match(hsv1, hsv2, ignore, tolerance):
-            """
-            Unified function to determine if two colors match based on HSV tolerance and ignore flags.
-            Returns True if colors match within tolerance or if ignored channels match.
-            """
-            # Check hue - account for its circular nature
-            if not ignore[0]:
-                h_diff = abs(hsv1[0] - hsv2[0])
-                h_dist = min(h_diff, 1.0 - h_diff)
-                if h_dist > tolerance:
-                    return False
-
-            # Check saturation
-            if not ignore[1]:
-                s_dist = abs(hsv1[1] - hsv2[1])
-                if s_dist > tolerance:
-                    return False
-
-            # Check value
-            if not ignore[2]:
-                v_dist = abs(hsv1[2] - hsv2[2])
-                if v_dist > tolerance:
-                    return False
+            bpy.ops.mesh.select_all(action='DESELECT')
 
-            return True
+        matching_col_idxs = matching_colors(self.select_color, self.hsv_tolerance, ignore_hsv)
 
-        # vert mode or edge mode
-        if bpy.context.tool_settings.mesh_select_mode[0] or bpy.context.tool_settings.mesh_select_mode[1]:
-            select_color_hsv = colorsys.rgb_to_hsv(*self.select_color)
+        # Vertices match by corners of the color, or by any corner within HSV tolerance
+        exact = self.hsv_tolerance == 0
+        vert_matching_col_idxs = matching_col_idxs if any(ignore_hsv) or self.hsv_tolerance > 0 else None
 
-            for obj_name in color_corner_lookup[select_color_idx][1]:
-                if obj_name not in obj_name_map:
-                    continue
+        select_mode = tuple(bpy.context.tool_settings.mesh_select_mode)
 
-                obj = obj_name_map[obj_name]
-                bm = bmesh.from_edit_mesh(obj.data)
-                bm.verts.ensure_lookup_table()
-
-                if self.hsv_tolerance == 0:
-                    for vert_idx in color_corner_lookup[select_color_idx][1][obj_name]:
-                        if len(color_corner_lookup[select_color_idx][1][obj_name][vert_idx]) / len(bm.verts[vert_idx].link_loops) >= (1 - self.selection_tolerance):
-                            bm.verts[vert_idx].select = True
-
-                # Process colors based on HSV distance and ignore flags
-                if any(ignore_hsv) or self.hsv_tolerance > 0:
-                    for col_idx in color_corner_lookup:
-                        if obj_name not in color_corner_lookup[col_idx][1]:
-                            continue
-
-                        color_hsv = colorsys.rgb_to_hsv(*color_corner_lookup[col_idx][0])
-
-                        # Check if the color matches using our unified function
-                        if is_color_match(select_color_hsv, color_hsv, ignore_hsv, self.hsv_tolerance):
-                            for vert_idx in color_corner_lookup[col_idx][1][obj_name]:
-                                bm.verts[vert_idx].select = True
-
-                # edge mode
-                if bpy.context.tool_settings.mesh_select_mode[1]:
-                    for edge in bm.edges:
-                        if edge.verts[0].select and edge.verts[1].select:
-                            edge.select = True
-
-                bmesh.update_edit_mesh(obj.data)
-
-        # face mode
-        if bpy.context.tool_settings.mesh_select_mode[2]:
-            select_color_hsv = colorsys.rgb_to_hsv(*self.select_color)
-
-            # Build a list of color indices that match the criteria.
-            matching_col_idxs = []
-            for col_idx, col_data in color_corner_lookup.items():
-                color_rgb = col_data[0]
-                color_hsv = colorsys.rgb_to_hsv(*color_rgb)
-                if is_color_match(select_color_hsv, color_hsv, ignore_hsv, self.hsv_tolerance):
-                    matching_col_idxs.append(col_idx)
-
-            # Loop over objects that contain the originally selected lookup color.
-            for obj_name in color_corner_lookup[select_color_idx][1]:
-                if obj_name not in obj_name_map:
-                    continue
+        # Loop over objects that contain the originally selected lookup color.
+        for mesh_name, index in color_lookup.meshes.items():
+            if mesh_name not in mesh_obj_map or index.count(select_color_idx) == 0:
+                continue
+
+            obj = mesh_obj_map[mesh_name]
+            with bulk_mesh(obj) as mesh:
+                # vert mode or edge mode
+                if select_mode[0] or select_mode[1]:
+                    vert_select = read_array(mesh.vertices, 'select', bool)
+                    vert_select |= match_vertices(index, len(vert_select), select_color_idx, vert_matching_col_idxs, self.selection_tolerance, exact)
+                    select_vertices(obj, mesh, vert_select, select_mode[1])
+
+                # face mode
+                if select_mode[2]:
+                    loop_starts = read_array(mesh.polygons, 'loop_start', np.int32)
+                    loop_totals = read_array(mesh.polygons, 'loop_total', np.int32)
+                    if len(loop_starts) == 0:
+                        continue
 
-                obj = obj_name_map[obj_name]
-                bm = bmesh.from_edit_mesh(obj.data)
-                bm.faces.ensure_lookup_table()
-
-                for face in bm.faces:
-                    match_count = 0
-                    for loop in face.loops:
-                        # For each loop, check against all matching colors.
-                        for col_idx in matching_col_idxs:
-                            obj_lookup = color_corner_lookup[col_idx][1]
-                            if obj_name in obj_lookup:
-                                # Check if this loop's vertex is registered and that the specific loop index is present.
-                                if loop.vert.index in obj_lookup[obj_name]:
-                                    if loop.index in obj_lookup[obj_name][loop.vert.index]:
-                                        match_count += 1
-                                        break  # Only count one match per loop.
-                    if face.loops and (match_count / len(face.loops)) >= (1 - self.selection_tolerance):
-                        face.select = True
-
-                bmesh.update_edit_mesh(obj.data)
-
-        bpy.context.scene.vrtxa_active_color_index = lookup_to_obj_col_idx_mapping[select_color_idx]
+                    face_select = read_array(mesh.polygons, 'select', bool)
+                    face_select |= match_faces(index, loop_starts, loop_totals, matching_col_idxs, self.selection_tolerance)
+                    select_faces(obj, mesh, face_select)
+
+        bpy.context.scene.vrtxa_active_color_index = self.select_color_idx
 
         return {"FINISHED"}
 
@@ -827,112 +1285,264 @@ class VRTXA_OT_AdjustHSV(bpy.types.Operator):
         if not objs:
             objs = [obj]
 
-        # Ignore non-mesh objects
-        objs = [x for x in objs if x.type == "MESH"]
+        # Ignore non-mesh objects, linked duplicates once
+        objs = unique_mesh_objects(objs)
 
         # Convert to normalized values
         hue_adjust = self.hue_change / 360.0  # Convert degrees to 0-1 range
         saturation_adjust = self.saturation_change / 100.0  # Convert percentage to 0-1 range
         value_adjust = self.value_change / 100.0  # Convert percentage to 0-1 range
 
+        select_mode = tuple(bpy.context.tool_settings.mesh_select_mode)
+
         changes = []
 
         for obj in objs:
             color_attribute = obj.data.color_attributes.active_color
-            if color_attribute is None:
+            if color_attribute is None or color_attribute.domain != 'CORNER':
                 continue
 
-            bm = bmesh.from_edit_mesh(obj.data)
-            active_layer = bm.loops.layers.color.get(color_attribute.name)
+            with bulk_mesh(obj) as mesh:
+                corners = selected_corners(mesh, select_mode)
+                if len(corners) == 0:
+                    continue
+
+                indexed = indexed_as_is(obj.data.name, mesh, color_attribute.name)
+
+                corner_colors = read_corner_colors(mesh, color_attribute.name)
+                corner_colors[corners, :3] = adjust_hsv_array(
+                    corner_colors[corners, :3],
+                    hue_adjust, saturation_adjust, value_adjust
+                )
+                write_corner_colors(obj, mesh, color_attribute.name, corner_colors, corners=corners)
+
+                if indexed:
+                    mesh_fingerprints[obj.data.name] = mesh_fingerprint(mesh, color_attribute.name)
+
+                # Lookup colors are as stored
+                corner_colors = read_corner_colors(mesh, color_attribute.name)
+                changes.append((obj.data.name, corners, corner_colors[corners, :3]))
 
-            if not active_layer:
+        if not changes:
+            return {"FINISHED"}
+
+        # Objects missing from the lookup need a full refresh
+        if any(obj.data.name not in color_lookup.meshes for obj in objs):
+            bpy.ops.vertx_artist.refresh('INVOKE_DEFAULT')
+            return {"FINISHED"}
+
+        # Update the lookup for the new colors
+        new_color_idx = update_lookups(changes)
+        if new_color_idx in color_lookup.positions:
+            sort_update_object_colors(new_color_idx)
+
+        return {"FINISHED"}
+
+
+hsv_preview_running = False
+
+class VRTXA_OT_PreviewHSV(bpy.types.Operator):
+    bl_idname = "vertx_artist.preview_hsv"
+    bl_label = "Preview HSV"
+    bl_description = "Adjust HSV values for selected faces interactively.\nMove mouse to change, H / S / V to switch component, click to confirm"
+    bl_options = {"REGISTER", "UNDO"}
+
+    hue_change: bpy.props.IntProperty(
+        name="Hue Change",
+        description="Value to adjust hue by (in degrees)",
+        default=0
+    )
+    saturation_change: bpy.props.IntProperty(
+        name="Saturation Change",
+        description="Value to adjust saturation by (in percent)",
+        default=0,
+        min=-100, max=100
+    )
+    value_change: bpy.props.IntProperty(
+        name="Value Change",
+        description="Value to adjust value by (in percent)",
+        default=0,
+        min=-100, max=100
+    )
+
+    # Mouse pixels per degree / percent
+    component_speed = {"hue_change": 1.0, "saturation_change": 4.0, "value_change": 4.0}
+    component_keys = {"H": "hue_change", "S": "saturation_change", "V": "value_change"}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'EDIT_MESH' and context.object is not None and context.object.data.color_attributes.active_color is not None
+
+    def snapshot(self):
+        """Keep mesh data and original colors of selected corners, until finished."""
+
+        obj = bpy.context.object
+        objs = bpy.context.selected_objects
+        if not objs:
+            objs = [obj]
+
+        select_mode = tuple(bpy.context.tool_settings.mesh_select_mode)
+
+        self.meshes = ExitStack()
+        self.targets = []
+
+        # Linked duplicates once
+        for obj in unique_mesh_objects(objs):
+            color_attribute = obj.data.color_attributes.active_color
+            if color_attribute is None or color_attribute.domain != 'CORNER':
                 continue
 
-            # Process based on selection mode
-            if bpy.context.tool_settings.mesh_select_mode[2]:  # Faces
-                for face in bm.faces:
-                    if face.select:
-                        for corner in face.loops:
-                            # Get current color (RGB)
-                            current_color = corner[active_layer][:3]
+            mesh = self.meshes.enter_context(bulk_mesh(obj))
+            corners = selected_corners(mesh, select_mode)
+            if len(corners) == 0:
+                continue
 
-                            # Convert to HSV
-                            h, s, v = colorsys.rgb_to_hsv(*current_color)
+            original_colors = read_corner_colors(mesh, color_attribute.name)[corners]
+            self.targets.append((obj, mesh, color_attribute.name, corners, original_colors, edit_loops(obj, mesh, corners)))
 
-                            # Adjust all components
-                            h = (h + hue_adjust) % 1.0
-                            s = max(0.0, min(1.0, s + saturation_adjust))
-                            v = max(0.0, min(1.0, v + value_adjust))
+        self.written = (0, 0, 0)
 
-                            # Convert back to RGB
-                            r, g, b = colorsys.hsv_to_rgb(h, s, v)
+    def delta(self):
+        return self.hue_change, self.saturation_change, self.value_change
 
-                            # Update the color
-                            corner[active_layer][0] = r
-                            corner[active_layer][1] = g
-                            corner[active_layer][2] = b
+    def adjusted_colors(self, original_colors):
+        """Selected corner colors adjusted from the original colors, never from previous previews."""
 
-                            changes.append((obj.name, corner.vert.index, corner.index))
+        corner_colors = original_colors.copy()
+        corner_colors[:, :3] = adjust_hsv_array(
+            original_colors[:, :3],
+            self.hue_change / 360.0,
+            self.saturation_change / 100.0,
+            self.value_change / 100.0
+        )
 
-            elif bpy.context.tool_settings.mesh_select_mode[0]:  # Vertices
-                for vert in bm.verts:
-                    if vert.select:
-                        for corner in vert.link_loops:
-                            # Get current color (RGB)
-                            current_color = corner[active_layer][:3]
+        return corner_colors
 
-                            # Convert to HSV
-                            h, s, v = colorsys.rgb_to_hsv(*current_color)
+    def write_preview(self):
+        """Write adjusted colors straight into the bmesh loops of selected corners."""
 
-                            # Adjust all components
-                            h = (h + hue_adjust) % 1.0
-                            s = max(0.0, min(1.0, s + saturation_adjust))
-                            v = max(0.0, min(1.0, v + value_adjust))
+        for obj, mesh, attribute_name, corners, original_colors, loops in self.targets:
+            write_loop_colors(obj, mesh.color_attributes[attribute_name], loops, self.adjusted_colors(original_colors))
 
-                            # Convert back to RGB
-                            r, g, b = colorsys.hsv_to_rgb(h, s, v)
+        self.written = self.delta()
 
-                            # Update the color
-                            corner[active_layer][0] = r
-                            corner[active_layer][1] = g
-                            corner[active_layer][2] = b
+    def restore(self):
+        if self.written != (0, 0, 0):
+            for obj, mesh, attribute_name, corners, original_colors, loops in self.targets:
+                write_loop_colors(obj, mesh.color_attributes[attribute_name], loops, original_colors)
 
-                            changes.append((obj.name, corner.vert.index, corner.index))
+        self.meshes.close()
 
-            elif bpy.context.tool_settings.mesh_select_mode[1]:  # Edges
-                for edge in bm.edges:
-                    if edge.select:
-                        for vert in edge.verts:
-                            for corner in vert.link_loops:
-                                # Get current color (RGB)
-                                current_color = corner[active_layer][:3]
+    def finish(self):
+        """Write the final colors, and update the lookup with them."""
 
-                                # Convert to HSV
-                                h, s, v = colorsys.rgb_to_hsv(*current_color)
+        changes = []
+        for obj, mesh, attribute_name, corners, original_colors, loops in self.targets:
+            # The mesh copy still has the colors from before the preview
+            indexed = indexed_as_is(obj.data.name, mesh, attribute_name)
 
-                                # Adjust all components
-                                h = (h + hue_adjust) % 1.0
-                                s = max(0.0, min(1.0, s + saturation_adjust))
-                                v = max(0.0, min(1.0, v + value_adjust))
+            corner_colors = read_corner_colors(mesh, attribute_name)
+            corner_colors[corners] = self.adjusted_colors(original_colors)
+            write_corner_colors(obj, mesh, attribute_name, corner_colors, corners=corners)
 
-                                # Convert back to RGB
-                                r, g, b = colorsys.hsv_to_rgb(h, s, v)
+            if indexed:
+                mesh_fingerprints[obj.data.name] = mesh_fingerprint(mesh, attribute_name)
 
-                                # Update the color
-                                corner[active_layer][0] = r
-                                corner[active_layer][1] = g
-                                corner[active_layer][2] = b
+            # Lookup colors are as stored
+            corner_colors = read_corner_colors(mesh, attribute_name)
+            changes.append((obj.data.name, corners, corner_colors[corners, :3]))
 
-                                changes.append((obj.name, corner.vert.index, corner.index))
+        self.meshes.close()
 
-            bmesh.update_edit_mesh(obj.data)
+        if not changes:
+            return
 
-        # Update the lookup for the new colors
-        if changes:
+        # Objects missing from the lookup need a full refresh
+        if any(obj.data.name not in color_lookup.meshes for obj, *_ in self.targets):
             bpy.ops.vertx_artist.refresh('INVOKE_DEFAULT')
+            return
+
+        new_color_idx = update_lookups(changes)
+        if new_color_idx in color_lookup.positions:
+            sort_update_object_colors(new_color_idx)
+
+    def stop(self, context):
+        global hsv_preview_running
+
+        hsv_preview_running = False
+        context.window_manager.event_timer_remove(self.timer)
+        context.area.header_text_set(None)
+
+    def header_text(self):
+        return (
+            f"Hue: {self.hue_change}°  Saturation: {self.saturation_change}%  Value: {self.value_change}%"
+            f"  |  H / S / V: component ({self.component[0].upper()}), Click / Enter: confirm, Right click / Esc: cancel"
+        )
+
+    def execute(self, context):
+        self.snapshot()
+        self.finish()
 
         return {"FINISHED"}
 
+    def modal(self, context, event):
+        if event.type in {'RIGHTMOUSE', 'ESC'} and event.value == 'PRESS':
+            self.stop(context)
+            self.restore()
+            return {'CANCELLED'}
+
+        if event.type in {'LEFTMOUSE', 'RET', 'NUMPAD_ENTER'} and event.value == 'PRESS':
+            self.stop(context)
+            self.finish()
+            return {'FINISHED'}
+
+        if event.type in self.component_keys and event.value == 'PRESS':
+            self.component = self.component_keys[event.type]
+            self.start_x = event.mouse_x
+            self.start_value = getattr(self, self.component)
+
+        elif event.type == 'MOUSEMOVE':
+            offset = (event.mouse_x - self.start_x) / self.component_speed[self.component]
+            old_value = getattr(self, self.component)
+
+            # Property limits clamp saturation and value
+            setattr(self, self.component, self.start_value + int(offset))
+            if getattr(self, self.component) != old_value:
+                context.area.header_text_set(self.header_text())
+
+        # Write at most once per timer tick, only when the adjustment differs from the one shown
+        elif event.type == 'TIMER' and self.delta() != self.written:
+            self.write_preview()
+
+        elif event.type in {'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE'}:
+            return {'PASS_THROUGH'}
+
+        return {'RUNNING_MODAL'}
+
+    def invoke(self, context, event):
+        global hsv_preview_running
+
+        self.snapshot()
+        if not self.targets:
+            self.meshes.close()
+            self.report({'WARNING'}, message="Nothing selected")
+            return {'CANCELLED'}
+
+        self.hue_change = 0
+        self.saturation_change = 0
+        self.value_change = 0
+
+        self.component = "hue_change"
+        self.start_x = event.mouse_x
+        self.start_value = 0
+
+        self.timer = context.window_manager.event_timer_add(LIVE_UPDATE_INTERVAL, window=context.window)
+        context.area.header_text_set(self.header_text())
+        context.window_manager.modal_handler_add(self)
+        hsv_preview_running = True
+
+        return {'RUNNING_MODAL'}
+
 
 def register():
     bpy.types.Scene.vrtxa_static_color = bpy.props.FloatVectorProperty(
@@ -987,14 +1597,36 @@ def register():
         max=100
     )
     bpy.utils.register_class(VRTXA_OT_AdjustHSV)
+    bpy.utils.register_class(VRTXA_OT_PreviewHSV)
 
     bpy.utils.register_class(VRTXA_OT_ShowhideObjectColors)
     bpy.utils.register_class(VRTXA_OT_Checkpoint)
     bpy.utils.register_class(VRTXA_OT_Refresh)
+    bpy.utils.register_class(VRTXA_OT_CancelRefresh)
     bpy.utils.register_class(VRTXA_OT_SelectByColor)
 
+    bpy.app.handlers.depsgraph_update_post.append(auto_refresh)
+    bpy.app.handlers.save_post.append(save_color_cache)
+    bpy.app.handlers.load_post.append(reset_color_lookup)
+
 
 def unregister():
+    if bpy.app.timers.is_registered(apply_pending_colors):
+        bpy.app.timers.unregister(apply_pending_colors)
+
+    if bpy.app.timers.is_registered(run_refresh_job):
+        bpy.app.timers.unregister(run_refresh_job)
+
+    if bpy.app.timers.is_registered(run_auto_refresh):
+        bpy.app.timers.unregister(run_auto_refresh)
+
+    bpy.app.handlers.depsgraph_update_post.remove(auto_refresh)
+    bpy.app.handlers.save_post.remove(save_color_cache)
+    bpy.app.handlers.load_post.remove(reset_color_lookup)
+
+    if bpy.app.timers.is_registered(load_color_cache):
+        bpy.app.timers.unregister(load_color_cache)
+
     del bpy.types.Scene.vrtxa_static_color
     bpy.utils.unregister_class(VRTXA_OT_SetColor)
     bpy.utils.unregister_class(VRTXA_OT_ApplyAlphaGradient)
@@ -1007,9 +1639,11 @@ def unregister():
     bpy.utils.unregister_class(VRTXA_OT_ShowhideObjectColors)
     bpy.utils.unregister_class(VRTXA_OT_Checkpoint)
     bpy.utils.unregister_class(VRTXA_OT_Refresh)
+    bpy.utils.unregister_class(VRTXA_OT_CancelRefresh)
     bpy.utils.unregister_class(VRTXA_OT_SelectByColor)
 
     del bpy.types.Scene.vrtxa_hue_change
     del bpy.types.Scene.vrtxa_saturation_change
     del bpy.types.Scene.vrtxa_value_change
     bpy.utils.unregister_class(VRTXA_OT_AdjustHSV)
+    bpy.utils.unregister_class(VRTXA_OT_PreviewHSV)
@@ -51,6 +51,25 @@ class VRTXA_AddonPreferences(bpy.types.AddonPreferences):
         description='How much can a vertex/face have other colors.',
         default=0.0, min=0.0, max=1.0
     )
+    eyedropper_sampling: bpy.props.EnumProperty(
+        name='eyedropper_sampling',
+        description='How the eyedropper samples colors of objects',
+        items=[
+            ('FACE', 'Face', 'Color of the face, if all its corners have the same color, otherwise color from screen'),
+            ('INTERPOLATE', 'Interpolate', 'Corner colors interpolated at the mouse position')
+        ],
+        default='FACE'
+    )
+    auto_refresh: bpy.props.BoolProperty(
+        name='auto_refresh',
+        description='Update object colors automatically, when colors or selection of selected objects change',
+        default=True
+    )
+    color_cache: bpy.props.BoolProperty(
+        name='color_cache',
+        description='Save object colors next to the .blend file when saving, and restore them when it is opened again',
+        default=False
+    )
     hide_edit_warning: bpy.props.BoolProperty(
         name='hide_edit_warning',
         description='Hide warning about editing layer channels',
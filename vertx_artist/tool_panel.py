@@ -3,6 +3,7 @@ import os
 import bpy
 import bpy.utils.previews
 
+from . import object_colors
 from .tools import col_attr_exists
 from .layers import display_alpha_extractbake, display_alpha_panel
 
@@ -34,6 +35,13 @@ class VRTXA_PT_PreferencesPopout(bpy.types.Panel):
 
         layout.prop(bpy.context.preferences.addons['vertx_artist'].preferences, 'selection_tolerance', text='Default Selection Tolerance')
 
+        row = layout.row()
+        row.label(text='Eyedropper Sampling:')
+        row.prop(bpy.context.preferences.addons['vertx_artist'].preferences, 'eyedropper_sampling', text='')
+
+        layout.prop(bpy.context.preferences.addons['vertx_artist'].preferences, 'auto_refresh', text='Auto Refresh Object Colors')
+        layout.prop(bpy.context.preferences.addons['vertx_artist'].preferences, 'color_cache', text='Cache Object Colors')
+
         box = layout.box()
         box.prop(bpy.context.preferences.addons['vertx_artist'].preferences, 'hide_edit_warning', text='Hide Edit Warning')
         box.prop(bpy.context.preferences.addons['vertx_artist'].preferences, 'hide_refresh_stack_warning', text='Hide Refresh Stack Warning')
@@ -96,6 +104,7 @@ class VRTXA_PT_HSVAdjust(bpy.types.Panel):
 
         right_row = layout.row(align=True)
         right_row.alignment = 'RIGHT'
+        right_row.operator('vertx_artist.preview_hsv', text="", icon='RESTRICT_VIEW_OFF')
         op = right_row.operator('vertx_artist.adjust_hsv', text="", icon='OPTIONS')
         op.hue_change = 0
         op.saturation_change = 0
@@ -270,6 +279,7 @@ def display_hsv_panel(layout):
 
     right_row = row.row(align=True)
     right_row.alignment = 'RIGHT'
+    right_row.operator('vertx_artist.preview_hsv', text="", icon='RESTRICT_VIEW_OFF')
     op = right_row.operator('vertx_artist.adjust_hsv', text="", icon='OPTIONS')
     op.hue_change = 0
     op.saturation_change = 0
@@ -333,10 +343,18 @@ def display_object_colors(layout):
     row.label(text='Adjust Object Colors', icon='GROUP_VCOL')
     row.operator('vertx_artist.showhide_object_colors', text='', icon='HIDE_OFF' if bpy.context.scene.vrtxa_show_object_colors else 'HIDE_ON', emboss=False)
 
+    object_colors.request_color_cache()
+
     if bpy.context.scene.vrtxa_show_object_colors:
         row = row.row(align=True)
         row.operator('vertx_artist.checkpoint', text='', icon_value=_icons['white_flag.png'].icon_id)
-        row.operator('vertx_artist.refresh', text='', icon='FILE_REFRESH')
+        op = row.operator('vertx_artist.refresh', text='', icon='FILE_REFRESH')
+        op.background = True
+
+        if object_colors.refresh_job is not None:
+            row = box.row()
+            row.label(text=f'Refreshing: {round(object_colors.refresh_job.progress() * 100)}%', icon='SORTTIME')
+            row.operator('vertx_artist.cancel_refresh', text='', icon='X')
 
         split = box.split()
         split.label(text='Active Color:')
@@ -521,7 +539,8 @@ class VRTXA_MT_Pie(bpy.types.Menu):
         op.use_static = True
 
         layout.operator('vertx_artist.checkpoint', icon_value=_icons['white_flag.png'].icon_id)
-        layout.operator('vertx_artist.refresh', text='Refresh', icon='FILE_REFRESH')
+        op = layout.operator('vertx_artist.refresh', text='Refresh', icon='FILE_REFRESH')
+        op.background = True
 
 
 def register():
@@ -1,7 +1,9 @@
-import colorsys
+from contextlib import ExitStack
 
 import bpy
 
+from .blending import compile_stack, run_stack, run_stacks
+from .mesh_data import bulk_mesh, read_corner_colors, unique_mesh_objects, write_corner_colors
 from .tools import items_to_enum, on_name_update
 
 
@@ -376,211 +378,42 @@ class VRTXA_OT_RefreshColorTransformationView(bpy.types.Operator):
         return context.window_manager.invoke_props_dialog(self, width=450)
 
 
-# https://github.com/blender/blender/blob/57013e2a44e974d307f08f41793d810a49537f96/source/blender/blenkernel/intern/material.c#L1521
-def mix_color(r_col, col, blend_type, fac):
-    """Mix color with modification."""
+def stack_modifications(modification_stack, only_visible):
+    """Modifications of stack as (blend_type, col, fac), col is flat color or blend layer name."""
 
-    facm = 1 - fac
+    modifications = []
 
-    match blend_type:
-        case "Mix":
-            r_col[0] = facm * r_col[0] + fac * col[0]
-            r_col[1] = facm * r_col[1] + fac * col[1]
-            r_col[2] = facm * r_col[2] + fac * col[2]
+    for modification in modification_stack.modifications:
+        if only_visible and not modification.include:
+            continue
 
-        case "Add":
-            r_col[0] += fac * col[0]
-            r_col[1] += fac * col[1]
-            r_col[2] += fac * col[2]
-
-        case "Multiply":
-            r_col[0] *= (facm + fac * col[0])
-            r_col[1] *= (facm + fac * col[1])
-            r_col[2] *= (facm + fac * col[2])
-
-        case "Screen":
-            r_col[0] = 1 - (facm + fac * (1 - col[0])) * (1 - r_col[0])
-            r_col[1] = 1 - (facm + fac * (1 - col[1])) * (1 - r_col[1])
-            r_col[2] = 1 - (facm + fac * (1 - col[2])) * (1 - r_col[2])
-
-        case "Overlay":
-            if r_col[0] < 0.5:
-                r_col[0] *= (facm + 2 * fac * col[0])
-            else:
-                r_col[0] = 1 - (facm + 2 * fac * (1 - col[0])) * (1 - r_col[0])
-
-            if r_col[1] < 0.5:
-                r_col[1] *= (facm + 2 * fac * col[1])
-            else:
-                r_col[1] = 1 - (facm + 2 * fac * (1 - col[1])) * (1 - r_col[1])
-
-            if r_col[2] < 0.5:
-                r_col[2] *= (facm + 2 * fac * col[2])
-            else:
-                r_col[2] = 1 - (facm + 2 * fac * (1 - col[2])) * (1 - r_col[2])
-
-        case "Subtract":
-            r_col[0] -= fac * col[0]
-            r_col[1] -= fac * col[1]
-            r_col[2] -= fac * col[2]
-
-        case "Divide":
-            if col[0] != 0:
-                r_col[0] = facm * r_col[0] + fac * r_col[0] / col[0]
-            if col[1] != 0:
-                r_col[1] = facm * r_col[1] + fac * r_col[1] / col[1]
-            if col[2] != 0:
-                r_col[2] = facm * r_col[2] + fac * r_col[2] / col[2]
-
-        case "Difference":
-            r_col[0] = facm * r_col[0] + fac * abs(r_col[0] - col[0])
-            r_col[1] = facm * r_col[1] + fac * abs(r_col[1] - col[1])
-            r_col[2] = facm * r_col[2] + fac * abs(r_col[2] - col[2])
-
-        case "Darken":
-            r_col[0] = min(r_col[0], col[0]) * fac + r_col[0] * facm
-            r_col[1] = min(r_col[1], col[1]) * fac + r_col[1] * facm
-            r_col[2] = min(r_col[2], col[2]) * fac + r_col[2] * facm
-
-        case "Lighten":
-            tmp = fac * col[0]
-
-            if tmp > r_col[0]:
-                r_col[0] = tmp
-
-            tmp = fac * col[1]
-
-            if tmp > r_col[1]:
-                r_col[1] = tmp
-
-            tmp = fac * col[2]
-
-            if tmp > r_col[2]:
-                r_col[2] = tmp
-
-        case "Color Dodge":
-            if r_col[0] != 0:
-                tmp = 1 - fac * col[0]
-
-                if tmp <= 0:
-                    r_col[0] = 1
-                elif (tmp := r_col[0] / tmp) > 1:
-                    r_col[0] = 1
-                else:
-                    r_col[0] = tmp
-
-            if r_col[1] != 0:
-                tmp = 1 - fac * col[1]
-
-                if tmp <= 0:
-                    r_col[1] = 1
-                elif (tmp := r_col[1] / tmp) > 1:
-                    r_col[1] = 1
-                else:
-                    r_col[1] = tmp
-
-            if r_col[2] != 0:
-                tmp = 1 - fac * col[2]
-
-                if tmp <= 0:
-                    r_col[2] = 1
-                elif (tmp := r_col[2] / tmp) > 1:
-                    r_col[2] = 1
-                else:
-                    r_col[2] = tmp
-
-        case "Color Burn":
-            tmp = facm + fac * col[0]
-
-            if tmp <= 0:
-                r_col[0] = 0
-            elif (tmp := 1 - (1 - r_col[0]) / tmp) < 0:
-                r_col[0] = 0
-            elif tmp > 1:
-                r_col[0] = 1
-            else:
-                r_col[0] = tmp
-
-            tmp = facm + fac * col[1]
-
-            if tmp <= 0:
-                r_col[1] = 0
-            elif (tmp := 1 - (1 - r_col[1]) / tmp) < 0:
-                r_col[1] = 0
-            elif tmp > 1:
-                r_col[1] = 1
-            else:
-                r_col[1] = tmp
-
-            tmp = facm + fac * col[2]
-
-            if tmp <= 0:
-                r_col[2] = 0
-            elif (tmp := 1 - (1 - r_col[2]) / tmp) < 0:
-                r_col[2] = 0
-            elif tmp > 1:
-                r_col[2] = 1
-            else:
-                r_col[2] = tmp
-
-        case "Hue":
-            col_h, col_s, col_v = colorsys.rgb_to_hsv(col[0], col[1], col[2])
-
-            if col_s != 0:
-                r_h, r_s, r_v = colorsys.rgb_to_hsv(r_col[0], r_col[1], r_col[2])
-                tmp_r, tmp_g, tmp_b = colorsys.hsv_to_rgb(col_h, r_s, r_v)
-
-                r_col[0] = facm * r_col[0] + fac * tmp_r
-                r_col[1] = facm * r_col[1] + fac * tmp_g
-                r_col[2] = facm * r_col[2] + fac * tmp_b
-
-        case "Saturation":
-            r_h, r_s, r_v = colorsys.rgb_to_hsv(r_col[0], r_col[1], r_col[2])
+        if modification.blend_layer == "flat color":
+            modifications.append((modification.blend_type, tuple(modification.blend_color), modification.factor))
+        else:
+            modifications.append((modification.blend_type, modification.blend_layer, modification.factor))
 
-            if r_s != 0:
-                col_h, col_s, col_v = colorsys.rgb_to_hsv(col[0], col[1], col[2])
-                r_col[0], r_col[1], r_col[2] = colorsys.hsv_to_rgb(r_h, facm * r_s + fac * col_s, r_v)
+    return modifications
 
-        case "Value":
-            r_h, r_s, r_v = colorsys.rgb_to_hsv(r_col[0], r_col[1], r_col[2])
-            col_h, col_s, col_v = colorsys.rgb_to_hsv(col[0], col[1], col[2])
-            r_col[0], r_col[1], r_col[2] = colorsys.hsv_to_rgb(r_h, r_s, facm * r_v + fac * col_v)
 
-        case "Color":
-            col_h, col_s, col_v = colorsys.rgb_to_hsv(col[0], col[1], col[2])
+def read_stack_layers(mesh, base_layer, modifications):
+    """Read base layer and every blend layer once, None if any is missing."""
 
-            if col_s != 0:
-                r_h, r_s, r_v = colorsys.rgb_to_hsv(r_col[0], r_col[1], r_col[2])
-                tmp_r, tmp_g, tmp_b = colorsys.hsv_to_rgb(col_h, col_s, r_v)
+    base_colors = read_corner_colors(mesh, base_layer, linear=True)
+    if base_colors is None:
+        return None, None
 
-                r_col[0] = facm * r_col[0] + fac * tmp_r
-                r_col[1] = facm * r_col[1] + fac * tmp_g
-                r_col[2] = facm * r_col[2] + fac * tmp_b
+    layer_colors = {}
+    for _, col, _ in modifications:
+        if not isinstance(col, str) or col in layer_colors:
+            continue
 
-        case "Soft Light":
-            scr = 1 - (1 - col[0]) * (1 - r_col[0])
-            scg = 1 - (1 - col[1]) * (1 - r_col[1])
-            scb = 1 - (1 - col[2]) * (1 - r_col[2])
+        colors = read_corner_colors(mesh, col, linear=True)
+        if colors is None:
+            return None, None
 
-            r_col[0] = facm * r_col[0] + fac * ((1 - r_col[0]) * col[0] * r_col[0] + r_col[0] * scr)
-            r_col[1] = facm * r_col[1] + fac * ((1 - r_col[1]) * col[1] * r_col[1] + r_col[1] * scg)
-            r_col[2] = facm * r_col[2] + fac * ((1 - r_col[2]) * col[2] * r_col[2] + r_col[2] * scb)
+        layer_colors[col] = colors[:, :3]
 
-        case "Linear Light":
-            if col[0] > 0.5:
-                r_col[0] += fac * (2 * (col[0] - 0.5))
-            else:
-                r_col[0] += fac * (2 * col[0] - 1)
-            
-            if col[1] > 0.5:
-                r_col[1] += fac * (2 * (col[1] - 0.5))
-            else:
-                r_col[1] += fac * (2 * col[1] - 1)
-        
-            if col[2] > 0.5:
-                r_col[2] += fac * (2 * (col[2] - 0.5))
-            else:
-                r_col[2] += fac * (2 * col[2] - 1)
+    return base_colors, layer_colors
 
 
 class VRTXA_OT_ApplyColorTransformationStack(bpy.types.Operator):
@@ -616,30 +449,85 @@ class VRTXA_OT_ApplyColorTransformationStack(bpy.types.Operator):
 
         out_layer = color_attributes.active_color
 
-        for i, l in enumerate(obj.data.loops):
-            out_layer.data[i].color = base_layer.data[i].color
+        with bulk_mesh(obj) as mesh:
+            modifications = stack_modifications(modification_stack, only_visible)
+            corner_colors, layer_colors = read_stack_layers(mesh, base_layer.name, modifications)
+            if corner_colors is None:
+                self.report({'WARNING'}, message="Base or blend layer is not a face corner layer.")
+                return {"FINISHED"}
 
-        for modification in modification_stack.modifications:
-            if only_visible and not modification.include:
-                continue
+            corner_colors[:, :3] = run_stack(corner_colors[:, :3], compile_stack(modifications), layer_colors)
 
-            if modification.blend_layer == "flat color":
-                for i, l in enumerate(obj.data.loops):
-                    mix_color(
-                        out_layer.data[i].color,
-                        modification.blend_color,
-                        modification.blend_type,
-                        modification.factor
-                    )
-            else:
-                mix_layer = color_attributes.get(modification.blend_layer)
-                for i, l in enumerate(obj.data.loops):
-                    mix_color(
-                        out_layer.data[i].color,
-                        mix_layer.data[i].color,
-                        modification.blend_type,
-                        modification.factor
-                    )
+            write_corner_colors(obj, mesh, out_layer.name, corner_colors, linear=True)
+
+        return {"FINISHED"}
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, 'only_visible', text='Apply', icon='NONE', emboss=True)
+
+    def invoke(self, context, event):
+        modification_stack = bpy.context.view_layer.objects.active.vrtxa_modification_stacks[bpy.context.view_layer.objects.active.vrtxa_modification_stack_enum]
+
+        if all(i.include for i in modification_stack.modifications):
+            return self.execute(context)
+
+        return context.window_manager.invoke_props_dialog(self, width=300)
+
+
+class VRTXA_OT_ApplyColorTransformationStackSelected(bpy.types.Operator):
+    bl_idname = "vertx_artist.apply_color_transformation_stack_selected"
+    bl_label = "Apply Color Transformation Stack to Selected"
+    bl_description = "Apply the active Color Transformation Stack to all selected objects, each into a new Color Layer"
+    bl_options = {"REGISTER", "UNDO"}
+
+    only_visible: bpy.props.EnumProperty(
+        name='transformations_visible_enum',
+        description='Apply only visible/all modifications',
+        items=[('All', 'All', ''), ('Only Visible', 'Only Visible', '')]
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return bpy.context.object is not None and bpy.context.object.vrtxa_modification_stack_enum != 'None'
+
+    def execute(self, context):
+        only_visible = self.only_visible == 'Only Visible'
+        modification_stack = bpy.context.view_layer.objects.active.vrtxa_modification_stacks[bpy.context.view_layer.objects.active.vrtxa_modification_stack_enum]
+        layer_name = f'{modification_stack.base_layer} / {modification_stack.name}'
+
+        modifications = stack_modifications(modification_stack, only_visible)
+        steps = compile_stack(modifications)
+        layer_names = {modification_stack.base_layer, *(x[1] for x in modifications if isinstance(x[1], str))}
+
+        # Objects sharing a mesh are baked once
+        objs = unique_mesh_objects(bpy.context.selected_objects)
+        skipped = []
+
+        with ExitStack() as meshes:
+            # Read on main thread, blend in workers, write on main thread
+            baked = []
+            for obj in objs:
+                layers = [obj.data.color_attributes.get(x) for x in layer_names]
+                if any(x is None or x.domain != 'CORNER' for x in layers):
+                    skipped.append(obj.name)
+                    continue
+
+                out_layer = obj.data.color_attributes.new(layer_name, 'BYTE_COLOR', 'CORNER')
+                obj.data.color_attributes.active_color = out_layer
+
+                mesh = meshes.enter_context(bulk_mesh(obj))
+                corner_colors, layer_colors = read_stack_layers(mesh, modification_stack.base_layer, modifications)
+                baked.append((obj, mesh, out_layer.name, corner_colors, layer_colors))
+
+            results = run_stacks([(corner_colors[:, :3], layer_colors) for _, _, _, corner_colors, layer_colors in baked], steps)
+
+            for (obj, mesh, out_name, corner_colors, _), result in zip(baked, results):
+                corner_colors[:, :3] = result
+                write_corner_colors(obj, mesh, out_name, corner_colors, linear=True)
+
+        if skipped:
+            self.report({'WARNING'}, message=f"Missing layers, skipped: {', '.join(skipped)}")
 
         return {"FINISHED"}
 
@@ -736,6 +624,7 @@ class VRTXA_PT_ColorTransformations(bpy.types.Panel):
             row = row.row()
             row.enabled = len(active_modification_stack.modifications) != 0
             op = row.operator('vertx_artist.apply_color_transformation_stack', text='Apply Stack', icon='CHECKMARK')
+            row.operator('vertx_artist.apply_color_transformation_stack_selected', text='Apply to Selected', icon='CHECKMARK')
 
 
 def register():
@@ -766,6 +655,7 @@ def register():
     bpy.utils.register_class(VRTXA_OT_AddColorTransformationLayer)
     bpy.utils.register_class(VRTXA_OT_RefreshColorTransformationView)
     bpy.utils.register_class(VRTXA_OT_ApplyColorTransformationStack)
+    bpy.utils.register_class(VRTXA_OT_ApplyColorTransformationStackSelected)
     bpy.utils.register_class(VRTXA_OT_ToggleColorTransformationVisibility)
 
     bpy.utils.register_class(VRTXA_UL_DisplayModifications)
@@ -787,6 +677,7 @@ def unregister():
     bpy.utils.unregister_class(VRTXA_OT_AddColorTransformationLayer)
     bpy.utils.unregister_class(VRTXA_OT_RefreshColorTransformationView)
     bpy.utils.unregister_class(VRTXA_OT_ApplyColorTransformationStack)
+    bpy.utils.unregister_class(VRTXA_OT_ApplyColorTransformationStackSelected)
     bpy.utils.unregister_class(VRTXA_OT_ToggleColorTransformationVisibility)
 
     bpy.utils.unregister_class(VRTXA_UL_DisplayModifications)